@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+
+def normalize_text(text):
+    """
+    Text as it is spoken and keyed: runs of whitespace collapsed to one space.
+    Case is kept, it changes the speech ("USA" is spelled out, "usa" is a word)
+    """
+    return ' '.join(str(text).split())
+
+
+class AudioCache:
+    """
+    Rendered speech files on disk, keyed by normalized text and voice settings,
+    with least-recently-used eviction once they take more than max_bytes.
+
+    Files survive restarts: the directory is scanned on start and its files are
+    ordered by modification time, which hits refresh. New files are written
+    under a temporary name and renamed into place, so a reader never sees a
+    partial file, and concurrent misses for one key wait for a single render.
+    """
+
+    def __init__(self, directory, max_bytes=64 * 2 ** 20, suffix='.wav'):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._files = OrderedDict()  # key -> size, least recently used first
+        self._rendering = {}  # key -> Event set when its render has finished
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evicted = 0
+
+        found = []
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.endswith(suffix):
+                stat = os.stat(path)
+                found.append((stat.st_mtime, name[:-len(suffix)], stat.st_size))
+            elif name.endswith('.tmp'):
+                os.remove(path)
+        for _, key, size in sorted(found):
+            self._files[key] = size
+            self._bytes += size
+
+    def key(self, text, settings):
+        payload = json.dumps([normalize_text(text), settings], sort_keys=True)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def get_or_render(self, key, render, timeout=None):
+        """
+        The file for key opened for reading, rendering it first on a miss
+        render(path) must write the audio to path or raise; while one request
+        renders a key, others asking for it wait up to timeout seconds
+        Returns: (file, hit)
+        """
+        with self._lock:
+            f = self._open(key)
+            if f is not None:
+                self._hits += 1
+                return f, True
+            self._misses += 1
+            done = self._rendering.get(key)
+            owner = done is None
+            if owner:
+                done = self._rendering[key] = threading.Event()
+
+        if not owner:
+            if not done.wait(timeout):
+                raise TimeoutError('speech render timed out')
+        else:
+            temp = os.path.join(self.directory, f'{key}.{uuid.uuid4().hex}.tmp')
+            try:
+                render(temp)
+                self._add(key, temp)
+            finally:
+                with self._lock:
+                    del self._rendering[key]
+                done.set()
+                if os.path.exists(temp):
+                    os.remove(temp)
+
+        with self._lock:
+            f = self._open(key)
+        if f is None:
+            raise RuntimeError('speech render produced no audio')
+        return f, False
+
+    def _open(self, key):
+        # Called with the lock held
+        if key not in self._files:
+            return None
+        try:
+            f = open(self.path(key), 'rb')
+        except FileNotFoundError:
+            # Removed behind our back
+            self._bytes -= self._files.pop(key)
+            return None
+        self._files.move_to_end(key)
+        os.utime(self.path(key))
+        return f
+
+    def _add(self, key, temp_path):
+        """Move a finished render into place, evicting the least recently used files over max_bytes"""
+        if not os.path.exists(temp_path) or not os.path.getsize(temp_path):
+            raise RuntimeError('speech render produced no audio')
+        size = os.path.getsize(temp_path)
+        with self._lock:
+            os.replace(temp_path, self.path(key))
+            self._bytes -= self._files.pop(key, 0)
+            self._files[key] = size
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self._files) > 1:
+                old, old_size = self._files.popitem(last=False)
+                try:
+                    os.remove(self.path(old))
+                except FileNotFoundError:
+                    pass
+                self._bytes -= old_size
+                self._evicted += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'files': len(self._files),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / lookups if lookups else 0.0,
+                'evicted': self._evicted,
+            }
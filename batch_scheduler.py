@@ -0,0 +1,100 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class SchedulerBusy(RuntimeError):
+    """Raised when the inference queue is full"""
+
+
+class InferenceScheduler:
+    """
+    Collects canvases from concurrent requests and runs them through the model
+    in one batched forward pass.
+
+    A batch is closed when it reaches max_batch_size or when batch_window_ms has
+    passed since its first canvas arrived, whichever comes first.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=16, batch_window_ms=5.0, max_queue_depth=256):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.batch_window_ms = batch_window_ms
+        self.max_queue_depth = max_queue_depth
+
+        self._queue = queue.Queue(maxsize=max_queue_depth)
+        self._lock = threading.Lock()
+        self._thread = None
+
+        self._batches = 0
+        self._items = 0
+        self._rejected = 0
+        self._last_batch_size = 0
+        self._largest_batch = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='inference-scheduler', daemon=True)
+                self._thread.start()
+
+    def submit(self, canvas, timeout=None):
+        """Queue one canvas and block until its probability vector is ready"""
+        self.start()
+        future = Future()
+        try:
+            self._queue.put_nowait((canvas, future))
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            raise SchedulerBusy(f"Inference queue is full ({self.max_queue_depth} pending)")
+        return future.result(timeout=timeout)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'batch_window_ms': self.batch_window_ms,
+                'max_batch_size': self.max_batch_size,
+                'max_queue_depth': self.max_queue_depth,
+                'queue_depth': self._queue.qsize(),
+                'batches': self._batches,
+                'items': self._items,
+                'rejected': self._rejected,
+                'avg_batch_size': (self._items / self._batches) if self._batches else 0.0,
+                'last_batch_size': self._last_batch_size,
+                'largest_batch': self._largest_batch,
+            }
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_window_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            canvases = [canvas for canvas, _ in batch]
+            try:
+                probs = self.predict_fn(canvases)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future), prob in zip(batch, probs):
+                    future.set_result(prob)
+
+            with self._lock:
+                self._batches += 1
+                self._items += len(batch)
+                self._last_batch_size = len(batch)
+                self._largest_batch = max(self._largest_batch, len(batch))
@@ -0,0 +1,115 @@
+"""
+Time from launching server.py to its first prediction.
+
+Starts the server as a fresh process (several times with --runs) and records,
+from the moment it was launched:
+
+    live              /health/live answers (the port is bound)
+    ready             /health/ready answers 200 (model loaded and warmed up)
+    first_prediction  the first /predict_landmarks call returns a letter
+
+plus the load/warm-up seconds the server reports itself on /health. The
+prediction uses fixed landmarks, so no camera or MediaPipe pass is involved.
+Extra environment variables for the server go after --env:
+
+    python bench_startup.py --runs 5 --json startup.json
+    python bench_startup.py --env MODEL_FILE=cnn8grps_rad1_model_int8.tflite
+    python bench_startup.py --env BACKGROUND_LOAD=0    # the old blocking startup
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+# An open hand in hd2 crop coordinates, any engine accepts it
+LANDMARKS = [[150, 330], [200, 300], [235, 255], [255, 215], [275, 185],
+             [190, 200], [195, 145], [198, 110], [200, 80],
+             [160, 195], [160, 135], [160, 95], [160, 60],
+             [130, 205], [125, 150], [122, 115], [120, 85],
+             [100, 220], [90, 180], [85, 150], [80, 125]]
+
+
+def request(url, body=None):
+    """(status, json) of one request, (None, None) while nothing listens on the port"""
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b'null')
+    except (urllib.error.URLError, ConnectionError):
+        return None, None
+
+
+def run_once(port, env, timeout):
+    base = f'http://127.0.0.1:{port}'
+    env = dict(os.environ, PORT=str(port), **env)
+    launched = time.perf_counter()
+    server = subprocess.Popen([sys.executable, 'server.py'], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    result = {}
+    try:
+        while time.perf_counter() - launched < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f'server.py exited with code {server.returncode}')
+            elapsed = time.perf_counter() - launched
+            if 'live' not in result:
+                if request(base + '/health/live')[0] == 200:
+                    result['live'] = elapsed
+            elif 'ready' not in result:
+                status, body = request(base + '/health/ready')
+                if status == 200:
+                    result['ready'] = elapsed
+                elif body and body.get('state') == 'failed':
+                    raise RuntimeError(f"server failed to start: {body.get('error')}")
+            else:
+                status, body = request(base + '/predict_landmarks',
+                                       {'landmarks': LANDMARKS, 'width': 200, 'height': 300})
+                if status == 200 and 'text' in body:
+                    result['first_prediction'] = time.perf_counter() - launched
+                    result['server_seconds'] = request(base + '/health')[1]['startup']['seconds']
+                    return result
+            time.sleep(0.02)
+        raise RuntimeError(f'no prediction within {timeout}s')
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--port', type=int, default=5077)
+    parser.add_argument('--timeout', type=float, default=300, help='seconds to wait for each run')
+    parser.add_argument('--env', nargs='*', default=[], metavar='NAME=VALUE', help='server environment')
+    parser.add_argument('--json', help='write the report to this file')
+    args = parser.parse_args()
+
+    env = dict(item.split('=', 1) for item in args.env)
+    runs = []
+    for i in range(args.runs):
+        runs.append(run_once(args.port, env, args.timeout))
+        print(f"run {i + 1}: live {runs[-1]['live']:.2f}s  ready {runs[-1]['ready']:.2f}s  "
+              f"first prediction {runs[-1]['first_prediction']:.2f}s")
+
+    report = {
+        'env': env,
+        'runs': runs,
+        'median_seconds': {key: float(np.median([run[key] for run in runs]))
+                           for key in ('live', 'ready', 'first_prediction')},
+    }
+    print(json.dumps(report['median_seconds'], indent=2))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+All AtoZ_3.1 skeleton canvases in one memory-mapped uint8 tensor.
+
+The builder decodes every <letter>/*.jpg once into an (N, 400, 400, 3) .npy
+file and writes an index next to it with the label, source path and byte
+offset of each canvas. CanvasStore maps the file read-only, so batches are
+views into the OS page cache: nothing is decoded or copied, and several
+processes reading the same file share the pages.
+
+    python canvas_store.py --dataset AtoZ_3.1 --out atoz_canvases.npy
+
+Rows are in the same order as landmark_index.py (letters, then file names).
+"""
+import argparse
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+CANVAS_STORE_FILE = 'atoz_canvases.npy'
+CANVAS_SHAPE = (400, 400, 3)
+
+
+def index_path(path):
+    """Index file stored next to a canvas store"""
+    return os.path.splitext(path)[0] + '.index.npz'
+
+
+def build_store(dataset_dir='AtoZ_3.1', path=CANVAS_STORE_FILE):
+    """Decode every dataset image into the store at path; returns the number of canvases"""
+    files = []
+    for letter in sorted(os.listdir(dataset_dir)):
+        if os.path.isdir(os.path.join(dataset_dir, letter)):
+            files += [(letter, p) for p in sorted(glob.glob(os.path.join(dataset_dir, letter, '*.jpg')))]
+
+    canvases = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8, shape=(len(files),) + CANVAS_SHAPE)
+    valid = np.ones(len(files), bool)
+    start = time.perf_counter()
+    for i, (_, file_path) in enumerate(files):
+        image = cv2.imread(file_path)
+        if image is None or image.shape != CANVAS_SHAPE:
+            # Keep the row so offsets stay aligned, mark it unusable
+            canvases[i] = 255
+            valid[i] = False
+            continue
+        canvases[i] = image
+    canvases.flush()
+    print(f"{len(files)} images decoded in {time.perf_counter() - start:.1f}s")
+
+    header = canvases.offset
+    del canvases
+    np.savez(index_path(path),
+             labels=np.array([letter for letter, _ in files]),
+             paths=np.array([os.path.relpath(p, dataset_dir) for _, p in files]),
+             offsets=header + np.arange(len(files), dtype=np.int64) * int(np.prod(CANVAS_SHAPE)),
+             valid=valid)
+    return len(files)
+
+
+class CanvasStore:
+    """Read-only view of a store written by build_store"""
+
+    def __init__(self, path=CANVAS_STORE_FILE):
+        self.canvases = np.load(path, mmap_mode='r')
+        with np.load(index_path(path)) as index:
+            self.labels = index['labels']
+            self.paths = index['paths']
+            self.offsets = index['offsets']
+            self.valid = index['valid']
+
+    def __len__(self):
+        return len(self.canvases)
+
+    def __getitem__(self, i):
+        return self.canvases[i]
+
+    def batches(self, batch_size=32, start=0, stop=None):
+        """
+        Yield (canvases, labels, first row) for consecutive rows
+        canvases are zero-copy (B, 400, 400, 3) views; invalid rows are included,
+        check self.valid[first:first + B] if the dataset had unreadable images
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        for first in range(start, stop, batch_size):
+            last = min(first + batch_size, stop)
+            yield self.canvases[first:last], self.labels[first:last], first
+
+    def take(self, rows):
+        """Canvases for arbitrary rows, in the order given (a copy, unlike batches)"""
+        rows = np.asarray(rows, dtype=np.intp)
+        # Read the file front to back, then put the canvases in the caller's order
+        order = np.argsort(rows, kind='stable')
+        out = np.empty((len(rows),) + self.canvases.shape[1:], dtype=self.canvases.dtype)
+        out[order] = self.canvases[rows[order]]
+        return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dataset', default='AtoZ_3.1')
+    parser.add_argument('--out', default=CANVAS_STORE_FILE)
+    args = parser.parse_args()
+
+    count = build_store(args.dataset, args.out)
+    print(f"Saved {count} canvases to {args.out} ({os.path.getsize(args.out) / 2 ** 30:.2f} GB) "
+          f"and {index_path(args.out)}")
+
+
+if __name__ == '__main__':
+    main()
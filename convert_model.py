@@ -0,0 +1,202 @@
+"""
+Convert the sign CNN to a quantized CPU runtime format and check what it costs.
+
+    python convert_model.py --export
+    python convert_model.py --quantize float16
+    python convert_model.py --quantize int8 --store atoz_canvases.npy
+    python convert_model.py --format onnx --quantize dynamic
+    python convert_model.py --check cnn8grps_rad1_model_int8.tflite --samples 500
+
+--export writes the unquantized float32 model as <name>.tflite next to the
+.h5. It gives the same groups, loads by memory-mapping one file instead of
+rebuilding the Keras graph, and server.py and final_pred.py pick it up on
+their own while it is newer than the .h5.
+
+Quantized models are written as <name>_<quantize>.<ext> and run through
+inference_backend.py (set MODEL_FILE for server.py and final_pred.py).
+Quantization modes:
+
+    float16  weights stored as float16, half the file; same speed on most CPUs
+    dynamic  weights int8, activations float
+    int8     weights and activations int8, calibrated on AtoZ_3.1 canvases;
+             the fastest on CPU
+
+--check runs the Keras model and the converted one, each in a fresh process,
+on the same AtoZ_3.1 canvases and reports group agreement, probability drift,
+group accuracy against the dataset labels, latency, file size and peak
+resident memory of both (on Windows only with psutil installed).
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import cv2
+import numpy as np
+
+from inference_backend import exported_path, load_backend
+from landmark_model import LETTER_GROUPS
+
+KERAS_MODEL_FILE = 'cnn8grps_rad1_model.h5'
+
+
+def sample_canvases(dataset, store, count):
+    """count canvases spread evenly over the dataset, with their letters"""
+    if store:
+        from canvas_store import CanvasStore
+        canvases = CanvasStore(store)
+        rows = np.linspace(0, len(canvases) - 1, min(count, len(canvases))).astype(int)
+        rows = rows[canvases.valid[rows]]
+        return canvases.take(rows), canvases.labels[rows]
+
+    files = sorted(glob.glob(os.path.join(dataset, '*', '*.jpg')))
+    files = [files[i] for i in np.linspace(0, len(files) - 1, min(count, len(files))).astype(int)]
+    images = [(cv2.imread(p), os.path.basename(os.path.dirname(p))) for p in files]
+    images = [(image, label) for image, label in images if image is not None and image.shape == (400, 400, 3)]
+    return np.stack([image for image, _ in images]), np.array([label for _, label in images])
+
+
+def convert_tflite(keras_path, out_path, quantize, calibration):
+    import tensorflow as tf
+    converter = tf.lite.TFLiteConverter.from_keras_model(tf.keras.models.load_model(keras_path))
+    if quantize != 'none':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantize == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantize == 'int8':
+        # Input and output stay float32, the interpreter quantizes at the edges
+        converter.representative_dataset = lambda: ([canvas[None].astype(np.float32)] for canvas in calibration)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    with open(out_path, 'wb') as f:
+        f.write(converter.convert())
+
+
+def convert_onnx(keras_path, out_path, quantize):
+    import tensorflow as tf
+    import tf2onnx
+    model = tf.keras.models.load_model(keras_path)
+    spec = (tf.TensorSpec((None, 400, 400, 3), tf.float32, name='input'),)
+    tf2onnx.convert.from_keras(model, input_signature=spec, opset=13, output_path=out_path)
+    if quantize == 'float16':
+        import onnx
+        from onnxconverter_common import float16
+        onnx.save(float16.convert_float_to_float16(onnx.load(out_path), keep_io_types=True), out_path)
+    elif quantize in ('dynamic', 'int8'):
+        # onnxruntime's static int8 needs a calibration reader; dynamic int8 covers the weights
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(out_path, out_path, weight_type=QuantType.QInt8)
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, None where it cannot be read"""
+    try:
+        import resource
+    except ImportError:
+        # Windows has no resource module; psutil is optional there
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / 2 ** 20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024
+
+
+def measure(path, dataset, store, samples, threads):
+    """Load one model in this (fresh) process and time it frame by frame"""
+    canvases, _ = sample_canvases(dataset, store, samples)
+    baseline = peak_rss_mb()
+
+    start = time.perf_counter()
+    model = load_backend(path, threads)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    outputs, times = [], []
+    for canvas in canvases:
+        start = time.perf_counter()
+        outputs.append(model.predict(canvas.reshape(1, 400, 400, 3), verbose=0)[0])
+        times.append((time.perf_counter() - start) * 1000)
+    # Skip the first call, it includes one-time graph setup
+    times = times[1:] or times
+    peak = peak_rss_mb()
+    return {
+        'backend': model.name,
+        'file_mb': os.path.getsize(path) / 2 ** 20,
+        'load_ms': load_ms,
+        'peak_rss_mb': peak - baseline if peak is not None else None,
+        'latency_ms': {'p50': float(np.percentile(times, 50)), 'p95': float(np.percentile(times, 95))},
+        'outputs': np.array(outputs, dtype=np.float32),
+    }
+
+
+def check(args):
+    _, labels = sample_canvases(args.dataset, args.store, args.samples)
+    groups = np.array([LETTER_GROUPS[str(label).upper()] for label in labels])
+
+    results = {}
+    for path in (args.model, args.check):
+        # A fresh process per model so memory and warm caches are not shared
+        with ProcessPoolExecutor(1, mp_context=get_context('spawn')) as pool:
+            results[path] = pool.submit(measure, path, args.dataset, args.store, args.samples, args.threads).result()
+
+    reference, candidate = results[args.model].pop('outputs'), results[args.check].pop('outputs')
+    top_ref, top_new = reference.argmax(axis=1), candidate.argmax(axis=1)
+    report = {
+        'samples': int(len(labels)),
+        'reference': dict(results[args.model], path=args.model),
+        'converted': dict(results[args.check], path=args.check),
+        'top1_agreement': float((top_ref == top_new).mean()),
+        'max_abs_prob_diff': float(np.abs(reference - candidate).max()),
+        'mean_abs_prob_diff': float(np.abs(reference - candidate).mean()),
+        'group_accuracy': {'reference': float((top_ref == groups).mean()),
+                           'converted': float((top_new == groups).mean())},
+    }
+    report['group_accuracy']['lost'] = report['group_accuracy']['reference'] - report['group_accuracy']['converted']
+
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default=KERAS_MODEL_FILE, help='Keras model to convert or compare against')
+    parser.add_argument('--export', action='store_true', help='write the float32 <model>.tflite the apps load in place of the .h5')
+    parser.add_argument('--format', choices=['tflite', 'onnx'], default='tflite')
+    parser.add_argument('--quantize', choices=['none', 'float16', 'dynamic', 'int8'], default='float16')
+    parser.add_argument('--out', help='output file (default <model>_<quantize>.<format>)')
+    parser.add_argument('--dataset', default='AtoZ_3.1')
+    parser.add_argument('--store', help='read canvases from a canvas_store.py file instead of the JPEGs')
+    parser.add_argument('--samples', type=int, default=300, help='canvases for int8 calibration or --check')
+    parser.add_argument('--check', metavar='CONVERTED', help='compare this converted model with --model')
+    parser.add_argument('--threads', type=int, help='--check: runtime threads')
+    parser.add_argument('--json', help='--check: write the report to this file')
+    args = parser.parse_args()
+
+    if args.check:
+        check(args)
+        return
+
+    if args.export:
+        args.format, args.quantize = 'tflite', 'none'
+        out = args.out or exported_path(args.model)
+    else:
+        out = args.out or f"{os.path.splitext(args.model)[0]}_{args.quantize}.{args.format}"
+    if args.format == 'onnx':
+        convert_onnx(args.model, out, args.quantize)
+    else:
+        calibration = sample_canvases(args.dataset, args.store, args.samples)[0] if args.quantize == 'int8' else None
+        convert_tflite(args.model, out, args.quantize, calibration)
+    print(f"Saved {out} ({os.path.getsize(out) / 2 ** 20:.1f} MB, "
+          f"{os.path.getsize(args.model) / 2 ** 20:.1f} MB before)")
+
+
+if __name__ == '__main__':
+    main()
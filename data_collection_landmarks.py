@@ -0,0 +1,84 @@
+import cv2
+from cvzone.HandTrackingModule import HandDetector
+import numpy as np
+import os
+import traceback
+
+from hand_skeleton import find_hand_landmarks, render_skeleton
+
+# Records the 21 landmarks (crop coordinates, same as the server) per frame
+# instead of skeleton images, for training landmark_model.py
+# Keys: a = start/stop capturing, n = next letter, esc = save and quit
+DATASET_FILE = os.environ.get('LANDMARK_DATASET', 'landmarks_dataset.npz')
+
+capture = cv2.VideoCapture(0)
+hd = HandDetector(maxHands=1)
+hd2 = HandDetector(maxHands=1)
+
+landmarks = []
+labels = []
+if os.path.exists(DATASET_FILE):
+    data = np.load(DATASET_FILE)
+    landmarks = list(data['landmarks'])
+    labels = list(data['labels'])
+
+c_dir = 'A'
+step = 1
+flag = False
+suv = 0
+
+
+def save():
+    np.savez_compressed(DATASET_FILE, landmarks=np.array(landmarks, dtype=np.int32).reshape(-1, 21, 2),
+                        labels=np.array(labels))
+    print("saved", len(labels), "samples to", DATASET_FILE)
+
+
+while True:
+    try:
+        _, frame = capture.read()
+        pts, w, h = find_hand_landmarks(frame, hd, hd2)
+        found = pts is not None and len(pts) >= 21
+        if found:
+            cv2.imshow("1", render_skeleton(pts, w, h))
+
+        count = labels.count(c_dir)
+        frame = cv2.putText(cv2.flip(frame, 1), "dir=" + str(c_dir) + "  count=" + str(count), (50, 50),
+                            cv2.FONT_HERSHEY_SIMPLEX,
+                            1, (255, 0, 0), 1, cv2.LINE_AA)
+        cv2.imshow("frame", frame)
+        interrupt = cv2.waitKey(1)
+        if interrupt & 0xFF == 27:
+            # esc key
+            break
+
+        if interrupt & 0xFF == ord('n'):
+            c_dir = chr(ord(c_dir) + 1)
+            if ord(c_dir) == ord('Z') + 1:
+                c_dir = 'A'
+            flag = False
+
+        if interrupt & 0xFF == ord('a'):
+            if flag:
+                flag = False
+                save()
+            else:
+                suv = 0
+                flag = True
+
+        if flag:
+            if suv == 180:
+                flag = False
+                save()
+            if step % 3 == 0 and found:
+                landmarks.append([p[:2] for p in pts[:21]])
+                labels.append(c_dir)
+                suv += 1
+            step += 1
+
+    except Exception:
+        print("==", traceback.format_exc())
+
+save()
+capture.release()
+cv2.destroyAllWindows()
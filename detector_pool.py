@@ -0,0 +1,62 @@
+import queue
+import threading
+from contextlib import contextmanager
+
+
+class DetectorPool:
+    """
+    Pool of (hd, hd2) HandDetector pairs for concurrent requests.
+
+    A MediaPipe graph must not be used by two threads at once, so each pair is
+    checked out by one request at a time. Pairs are created on demand up to
+    size; when all of them are busy, checkout() waits for one to come back.
+    """
+
+    def __init__(self, factory, size=4):
+        self.factory = factory
+        self.size = max(1, size)
+
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._waits = 0
+
+    @contextmanager
+    def checkout(self):
+        pair = self._acquire()
+        try:
+            yield pair
+        finally:
+            self._idle.put(pair)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pool_size': self.size,
+                'created': self._created,
+                'idle': self._idle.qsize(),
+                'in_use': self._created - self._idle.qsize(),
+                'waits': self._waits,
+            }
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+            else:
+                self._waits += 1
+
+        if create:
+            try:
+                return (self.factory(), self.factory())
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._idle.get()
@@ -0,0 +1,318 @@
+"""
+Accuracy and per-stage latency of the recognition pipeline.
+
+Runs labelled images through the same steps as server.predict_sign_advanced
+(decode, detect, render, model, rules) one frame at a time and reports overall
+and per-letter accuracy, the confusion matrix and p50/p95/p99 latency of every
+stage, optionally as JSON so runs on different machines, models or settings
+can be compared.
+
+Sources:
+  --dataset AtoZ_3.1   the skeleton canvases themselves. They are already
+                       rendered, so there is no detect stage: landmarks come
+                       from the landmark index (landmark_index.py) and the
+                       canvas goes to the model as-is (--rerender draws it
+                       again from the landmarks like the server does).
+                       Images no skeleton could be recovered from are left
+                       out of the accuracy and counted as unrecovered.
+                       --store reads canvases from canvas_store.py instead of
+                       decoding JPEGs.
+  --photos DIR         camera photos in DIR/<letter>/*.jpg, the full pipeline
+                       including MediaPipe.
+
+--held-out scores only the dataset images template_matcher.py holds out (every
+5th recovered image of each letter). --engine template on the dataset always
+does, with templates built from the other images, since templates made from
+the scored images would match them exactly. Pass --held-out to the other
+engines to compare them on the same images.
+
+    python evaluate.py --dataset AtoZ_3.1 --model cnn8grps_rad1_model.h5 --json eval.json
+    python evaluate.py --photos my_photos --engine landmark --json eval_landmark.json
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+from frame_pipeline import Frame
+from hand_skeleton import LANDMARK_MODES, find_hand_landmarks, offset, render_skeleton
+from sign_rules import SignRuleEngine
+
+STAGES = ('decode', 'detect', 'render', 'model', 'rules')
+
+
+class StageTimer:
+    """
+    Collects wall-clock milliseconds per stage, and per frame the sum of its
+    stages as 'total' (setup outside the stages, like building the landmark
+    index or the detectors, is not part of any frame)
+    """
+
+    def __init__(self):
+        self.times = defaultdict(list)
+        self._frame_ms = 0.0
+
+    @contextmanager
+    def __call__(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.times[stage].append(elapsed)
+            self._frame_ms += elapsed
+
+    def end_frame(self, scored=True):
+        """Record the stages timed since the last call as one frame's total, unless not scored"""
+        if scored:
+            self.times['total'].append(self._frame_ms)
+        self._frame_ms = 0.0
+
+    def summary(self):
+        result = {}
+        for stage in STAGES + ('total',):
+            times = self.times.get(stage)
+            if times:
+                result[stage] = {
+                    'count': len(times),
+                    'mean': float(np.mean(times)),
+                    'p50': float(np.percentile(times, 50)),
+                    'p95': float(np.percentile(times, 95)),
+                    'p99': float(np.percentile(times, 99)),
+                }
+        return result
+
+
+def load_engine(args):
+    """
+    Returns (predict, needs_canvas): predict(canvas, pts) gives 8 group
+    probabilities, or a (letter, confidence) tuple for the template engine
+    """
+    if args.engine == 'landmark':
+        from landmark_model import LandmarkClassifier
+        classifier = LandmarkClassifier(args.landmark_model)
+        return (lambda canvas, pts: classifier.predict([pts])[0]), False
+    if args.engine == 'template':
+        from template_matcher import TemplateMatcher, dataset_landmarks, held_out_mask
+        if args.photos:
+            matcher = TemplateMatcher.load(args.templates)
+        else:
+            # Only the images not being scored become templates
+            landmarks, labels, _, _ = dataset_landmarks(args.dataset, args.index)
+            train = ~held_out_mask(labels)
+            matcher = TemplateMatcher(landmarks[train], labels[train])
+        return (lambda canvas, pts: matcher.classify(pts)), False
+
+    from inference_backend import load_backend
+    model = load_backend(args.model)
+
+    def predict(canvas, pts):
+        return np.array(model.predict(canvas.reshape(1, 400, 400, 3), verbose=0)[0], dtype='float32')
+    return predict, True
+
+
+def dataset_samples(args, timer):
+    """(label, canvas, pts) per AtoZ image; pts is None where no skeleton was recovered"""
+    from landmark_index import update_index
+    index = update_index(args.dataset, args.index)
+
+    store = None
+    if args.store:
+        from canvas_store import CanvasStore
+        store = CanvasStore(args.store)
+        store_rows = {str(p): i for i, p in enumerate(store.paths)}
+
+    rows = np.arange(len(index['labels']))
+    if args.held_out:
+        from template_matcher import held_out_mask
+        recovered = np.nonzero(index['valid'])[0]
+        rows = recovered[held_out_mask(index['labels'][recovered])]
+
+    for j in limited(index['labels'][rows], args.per_letter):
+        i = rows[j]
+        label, path = str(index['labels'][i]), str(index['paths'][i])
+        pts = None
+        if index['valid'][i]:
+            pts = index['landmarks'][i].astype(int)
+            # Into crop coordinates, the way the server gets them from MediaPipe
+            pts = (pts - pts.min(axis=0) + offset).tolist()
+
+        if pts is None:
+            yield label, None, None
+            continue
+
+        with timer('decode'):
+            if store is not None:
+                canvas = np.array(store[store_rows[path]])
+            else:
+                canvas = cv2.imread(os.path.join(args.dataset, path))
+        if args.rerender:
+            with timer('render'):
+                w, h = (np.max(pts, axis=0) - np.min(pts, axis=0)).tolist()
+                canvas = render_skeleton(pts, w, h)
+        yield label, canvas, pts
+
+
+def photo_samples(args, timer, needs_canvas):
+    """(label, canvas, pts) per photo in <letter>/ folders, through MediaPipe like the server"""
+    from cvzone.HandTrackingModule import HandDetector
+    # The photos are unrelated, so no tracking from one to the next
+    hd, hd2 = HandDetector(staticMode=True, maxHands=1), HandDetector(staticMode=True, maxHands=1)
+
+    files = []
+    for letter in sorted(os.listdir(args.photos)):
+        folder = os.path.join(args.photos, letter)
+        if os.path.isdir(folder):
+            files += [(letter.upper(), p) for p in sorted(glob.glob(os.path.join(folder, '*')))
+                      if p.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp'))]
+    labels = np.array([label for label, _ in files])
+
+    for i in limited(labels, args.per_letter):
+        label, path = files[i]
+        with open(path, 'rb') as f:
+            buf = f.read()
+        with timer('decode'):
+            frame = Frame.decode(buf)
+        if frame is None:
+            continue
+        with timer('detect'):
+            pts, w, h = find_hand_landmarks(frame, hd, hd2, mode=args.landmark_mode)
+        if pts is None or len(pts) < 21:
+            yield label, None, None
+            continue
+        canvas = None
+        if needs_canvas:
+            with timer('render'):
+                canvas = render_skeleton(pts, w, h)
+        yield label, canvas, pts
+
+
+def limited(labels, per_letter):
+    """Row numbers, at most per_letter of each label (all if per_letter is None)"""
+    seen = defaultdict(int)
+    for i, label in enumerate(labels):
+        if per_letter is None or seen[label] < per_letter:
+            seen[label] += 1
+            yield i
+
+
+def evaluate(args):
+    predict, needs_canvas = load_engine(args)
+    rules = SignRuleEngine('server')
+    timer = StageTimer()
+
+    if args.photos:
+        samples = photo_samples(args, timer, needs_canvas)
+    else:
+        samples = dataset_samples(args, timer)
+
+    truth, predicted = [], []
+    frames = no_hand = 0
+    unrecovered = defaultdict(int)
+    for label, canvas, pts in samples:
+        if pts is None and not args.photos:
+            # The skeleton could not be read back from the dataset image: says
+            # nothing about the pipeline, so it is not scored
+            unrecovered[label] += 1
+            timer.end_frame(scored=False)
+            continue
+        frames += 1
+        if pts is None:
+            no_hand += 1
+            truth.append(label)
+            predicted.append('—')
+            timer.end_frame(scored=False)
+            continue
+
+        with timer('model'):
+            result = predict(canvas, pts)
+        if isinstance(result, tuple):
+            # Template letters get the server's gesture pass, like the group engines
+            with timer('rules'):
+                letter = str(rules.apply_gestures([result[0]], [pts])[0])
+        else:
+            with timer('rules'):
+                letter = rules.classify(result, pts)[0]
+        timer.end_frame()
+        truth.append(label)
+        predicted.append(letter)
+
+    truth, predicted = np.array(truth), np.array(predicted)
+    letters = sorted(set(truth) | set(unrecovered))
+    columns = letters + sorted(set(predicted) - set(letters))
+    column = {c: i for i, c in enumerate(columns)}
+    matrix = np.zeros((len(letters), len(columns)), int)
+    for t, p in zip(truth, predicted):
+        matrix[letters.index(t), column[p]] += 1
+
+    return {
+        'source': 'photos' if args.photos else 'dataset',
+        'engine': args.engine,
+        'held_out': bool(args.held_out),
+        'landmark_mode': args.landmark_mode if args.photos else None,
+        'frames': frames,
+        'no_hand': no_hand,
+        'unrecovered': sum(unrecovered.values()),
+        'accuracy': float((truth == predicted).mean()) if frames else 0.0,
+        'per_letter': {
+            letter: {'frames': int((truth == letter).sum()),
+                     'unrecovered': unrecovered[letter],
+                     'accuracy': float((predicted[truth == letter] == letter).mean())
+                     if (truth == letter).any() else None}
+            for letter in letters
+        },
+        'confusion': {'rows': letters, 'columns': columns, 'matrix': matrix.tolist()},
+        'latency_ms': timer.summary(),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'opencv': cv2.__version__,
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--dataset', default='AtoZ_3.1', help='skeleton image dataset (default)')
+    source.add_argument('--photos', help='folder of <letter>/ photo folders')
+    parser.add_argument('--index', default='atoz_landmarks.npz', help='landmark index of --dataset')
+    parser.add_argument('--store', help='canvas store of --dataset (canvas_store.py)')
+    parser.add_argument('--rerender', action='store_true', help='redraw dataset canvases from the landmarks')
+    parser.add_argument('--engine', choices=['cnn', 'landmark', 'template'], default='cnn')
+    parser.add_argument('--model', default='cnn8grps_rad1_model.h5', help='.h5, or .tflite/.onnx from convert_model.py')
+    parser.add_argument('--landmark-model', default='landmark_model.npz')
+    parser.add_argument('--templates', default='template_index.npz')
+    parser.add_argument('--landmark-mode', choices=LANDMARK_MODES, default='two_pass')
+    parser.add_argument('--per-letter', type=int, help='at most this many images per letter')
+    parser.add_argument('--held-out', action='store_true',
+                        help='score only the dataset images the template engine holds out')
+    parser.add_argument('--json', help='write the report to this file')
+    args = parser.parse_args()
+    if args.photos and args.held_out:
+        parser.error('--held-out applies to --dataset only')
+    if args.engine == 'template' and not args.photos and not args.held_out:
+        print('--engine template on the dataset scores the held-out images only (--held-out)')
+        args.held_out = True
+
+    report = evaluate(args)
+    summary = {k: report[k] for k in ('source', 'engine', 'held_out', 'frames', 'no_hand', 'unrecovered', 'accuracy')}
+    print(json.dumps(summary, indent=2))
+    for stage, times in report['latency_ms'].items():
+        print(f"{stage:>8}: p50 {times['p50']:.2f} ms  p95 {times['p95']:.2f} ms  p99 {times['p99']:.2f} ms")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""
+Frame preprocessing for hand detection.
+
+Palm detection does not need full capture resolution, so a frame is decoded
+straight from its JPEG bytes at 1/2, 1/4 or 1/8 size (libjpeg scales while
+decoding) while staying at least DETECT_WIDTH pixels wide. The pixels are
+never mirrored: detections on the unmirrored reduced frame are mapped to the
+coordinates of the mirrored full-resolution frame the rest of the pipeline
+works in (the same coordinates as cv2.flip(frame, 1) in final_pred.py). Only
+the hand region that goes to the second landmark pass is read at full
+resolution and mirrored, and the full-resolution decode happens only for
+frames where a hand was found.
+
+When a hand is expected (the previous frame of a tracking session had one),
+decoding twice would cost more than it saves, so the frame is decoded once at
+full resolution and scaled down for detection instead.
+
+EXIF orientation tags are ignored, as on the PIL decode path.
+`python frame_pipeline.py` checks the decode against a plain full-resolution
+decode, rotated JPEGs included.
+"""
+import io
+import os
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# Narrowest reduced frame given to the palm detector; 0 always detects at full resolution
+DETECT_WIDTH = int(os.environ.get('DETECT_WIDTH', 480))
+
+# Grayscale thumbnail compared between frames of a session to spot a still scene
+THUMBNAIL_SIZE = (64, 48)
+
+# EXIF orientation is ignored like the PIL fallback does: the header size read
+# before decoding must match the decoded pixels
+FULL_FLAGS = cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION
+REDUCED_FLAGS = {1: FULL_FLAGS,
+                 2: cv2.IMREAD_REDUCED_COLOR_2 | cv2.IMREAD_IGNORE_ORIENTATION,
+                 4: cv2.IMREAD_REDUCED_COLOR_4 | cv2.IMREAD_IGNORE_ORIENTATION,
+                 8: cv2.IMREAD_REDUCED_COLOR_8 | cv2.IMREAD_IGNORE_ORIENTATION}
+
+
+def reduction_for(width, detect_width=DETECT_WIDTH):
+    """Largest of 8, 4, 2 that keeps width at least detect_width, else 1"""
+    if detect_width > 0:
+        for factor in (8, 4, 2):
+            if width // factor >= detect_width:
+                return factor
+    return 1
+
+
+class Frame:
+    """
+    One camera frame: a reduced unmirrored copy for palm detection, and the
+    full-resolution pixels loaded only when a hand region is cropped
+    """
+
+    def __init__(self, small, scale, width, height, load_full):
+        self.small = small
+        self.scale = scale
+        self.width = width
+        self.height = height
+        self._load_full = load_full
+        self._full = None
+
+    @classmethod
+    def decode(cls, buf, detect_width=DETECT_WIDTH, hand_expected=False):
+        """Frame of encoded image bytes, or None if they are not a decodable image"""
+        data = np.frombuffer(buf, np.uint8)
+        if not data.size:
+            return None
+        if hand_expected:
+            image = cv2.imdecode(data, FULL_FLAGS)
+            return cls.from_image(image, detect_width) if image is not None and image.size else None
+        try:
+            # Only the header is read here
+            width, height = Image.open(io.BytesIO(buf)).size
+        except Exception:
+            width = height = 0
+        factor = reduction_for(width, detect_width)
+        small = cv2.imdecode(data, REDUCED_FLAGS[factor])
+        if small is None or small.size == 0:
+            return None
+        if factor == 1:
+            return cls.from_image(small, detect_width=0)
+        return cls(small, factor, width, height, lambda: cv2.imdecode(data, FULL_FLAGS))
+
+    @classmethod
+    def from_image(cls, image, detect_width=DETECT_WIDTH):
+        """Frame of an already decoded BGR image (camera capture, PIL fallback)"""
+        height, width = image.shape[:2]
+        factor = reduction_for(width, detect_width)
+        small = image
+        if factor > 1:
+            small = cv2.resize(image, (width // factor, height // factor), interpolation=cv2.INTER_AREA)
+        frame = cls(small, factor, width, height, None)
+        frame._full = image
+        return frame
+
+    @property
+    def full(self):
+        """The unmirrored full-resolution frame, decoded on first use"""
+        if self._full is None:
+            self._full = self._load_full()
+            self._load_full = None
+        return self._full
+
+    def thumbnail(self):
+        """Small grayscale copy of the reduced frame; area averaging evens out sensor noise"""
+        gray = cv2.cvtColor(self.small, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+
+    def mirror_x(self, x):
+        """x of a reduced-frame point in the mirrored full-resolution frame"""
+        return self.width - 1 - int(round((x + 0.5) * self.scale - 0.5))
+
+    def mirror_points(self, lm_list):
+        """Reduced-frame landmarks (cvzone lmList) in mirrored full-resolution coordinates"""
+        return [[self.mirror_x(p[0]), int(round((p[1] + 0.5) * self.scale - 0.5))] + list(p[2:])
+                for p in lm_list]
+
+    def mirror_bbox(self, bbox):
+        """Reduced-frame (x, y, w, h) box in mirrored full-resolution coordinates"""
+        x, y, w, h = bbox
+        s = self.scale
+        # Pixels x .. x + w of the reduced frame cover full-resolution columns x * s .. (x + w + 1) * s - 1
+        return self.width - (x + w + 1) * s, y * s, w * s, h * s
+
+    def mirrored_roi(self, x_start, y_start, x_end, y_end):
+        """
+        Pixels of the mirrored full-resolution frame in [x_start, x_end) x [y_start, y_end),
+        read from the unmirrored frame and mirrored alone
+        """
+        region = self.full[y_start:y_end, self.width - x_end:self.width - x_start]
+        return cv2.flip(region, 1)
+
+
+def check_parity(width=1920, height=1080):
+    """
+    Frame.decode against a plain full-resolution decode, for a landscape JPEG
+    and the same JPEG tagged EXIF orientation 6 (rotated 90 degrees): sizes,
+    reduced copy and mirrored crops must agree, with and without a hand expected
+    """
+    rng = np.random.default_rng(0)
+    pixels = cv2.resize(rng.integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8), (width, height))
+    for orientation in (1, 6):
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        out = io.BytesIO()
+        Image.fromarray(pixels).save(out, 'JPEG', quality=95, exif=exif)
+        buf = out.getvalue()
+        reference = cv2.flip(cv2.imdecode(np.frombuffer(buf, np.uint8), FULL_FLAGS), 1)
+        for hand_expected in (False, True):
+            frame = Frame.decode(buf, hand_expected=hand_expected)
+            case = f'orientation={orientation} hand_expected={hand_expected}'
+            assert (frame.height, frame.width) == reference.shape[:2], case
+            assert frame.full.shape == reference.shape, case
+            assert frame.small.shape[:2] == (height // frame.scale, width // frame.scale), case
+            assert frame.small.shape[1] >= min(width, DETECT_WIDTH), case
+            roi = frame.mirrored_roi(100, 200, 500, 700)
+            assert np.array_equal(roi, reference[200:700, 100:500]), case
+            x, y, w, h = frame.mirror_bbox((10, 20, 30, 40))
+            assert x + w <= frame.width and y + h <= frame.height, case
+            print(f'{case}: {frame.width}x{frame.height} detected at 1/{frame.scale} ok')
+
+
+if __name__ == '__main__':
+    check_parity()
@@ -0,0 +1,255 @@
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+from frame_pipeline import Frame
+
+# Padding around the hand bbox when cropping (same as final_pred.py)
+offset = 29
+
+LANDMARK_MODES = ('two_pass', 'single_pass')
+
+
+def first_hand(result):
+    """
+    Return the first hand map from a cvzone findHands() result, or None
+    Handles both cvzone return styles: (hands, img) tuples and bare lists
+    """
+    if isinstance(result, tuple):
+        hands = result[0] if result[0] else []
+    else:
+        hands = result if result else []
+    if not hands:
+        return None
+
+    hand = hands[0]
+    if isinstance(hand, list):
+        # Structure like final_pred.py: hands[0] is a list, hands[0][0] is the map
+        return hand[0] if len(hand) > 0 and isinstance(hand[0], dict) else None
+    return hand if isinstance(hand, dict) else None
+
+
+def landmarks_in_crop(lm_list, x_start, y_start):
+    """Shift frame landmarks into the coordinates of a crop starting at (x_start, y_start)"""
+    return [[p[0] - x_start, p[1] - y_start] + list(p[2:]) for p in lm_list]
+
+
+@contextmanager
+def untimed(stage):
+    yield
+
+
+def find_hand_landmarks(frame, hd, hd2, mode='two_pass', timer=untimed):
+    """
+    Find the hand on the mirrored frame and return its landmarks in crop coordinates
+
+    frame is a frame_pipeline.Frame, or a BGR image which is wrapped in one.
+    hd runs on the reduced unmirrored copy and its bbox and landmarks are mapped
+    into the mirrored full-resolution frame (what final_pred.py gets from
+    cv2.flip(frame, 1)), so only the hand region is ever mirrored.
+
+    two_pass (same as final_pred.py): run hd on the frame, then hd2 again on the
+    full-resolution crop around the bbox and take its landmarks.
+    single_pass: take the landmarks from the first pass and shift them into the
+    crop, so MediaPipe runs once per frame; hd2 is not used.
+    timer(stage) is entered around 'find_hands', 'crop' (including the
+    full-resolution decode of a reduced frame) and 'find_hands_crop'.
+
+    Returns: (landmarks_list, w, h) where w, h is the first-pass bbox size
+    """
+    pts = None
+    w = h = 0
+
+    if not isinstance(frame, Frame):
+        frame = Frame.from_image(frame)
+
+    with timer('find_hands'):
+        hand = first_hand(hd.findHands(frame.small, draw=False, flipType=True))
+    if hand is None:
+        return pts, w, h
+
+    x, y, w, h = frame.mirror_bbox(hand.get('bbox', (0, 0, 0, 0)))
+
+    # Extract hand region with offset
+    y_start = max(0, y - offset)
+    y_end = min(frame.height, y + h + offset)
+    x_start = max(0, x - offset)
+    x_end = min(frame.width, x + w + offset)
+    if y_end <= y_start or x_end <= x_start:
+        return pts, w, h
+
+    if mode == 'single_pass':
+        lm_list = hand.get('lmList')
+        if lm_list:
+            with timer('crop'):
+                pts = landmarks_in_crop(frame.mirror_points(lm_list), x_start, y_start)
+        return pts, w, h
+
+    with timer('crop'):
+        image = frame.mirrored_roi(x_start, y_start, x_end, y_end)
+    if image.size > 0 and len(image.shape) == 3:
+        # Second hand detection on cropped image
+        with timer('find_hands_crop'):
+            hand = first_hand(hd2.findHands(image, draw=False, flipType=True))
+        if hand is not None:
+            pts = hand.get('lmList', None)
+
+    return pts, w, h
+
+
+def render_skeleton(pts, w, h):
+    """
+    Draw the 21 landmarks on a 400x400 white canvas, centred using the
+    hand bbox size (same drawing as final_pred.py)
+    """
+    white = np.ones((400, 400, 3), np.uint8) * 255
+    os = ((400 - w) // 2) - 15
+    os1 = ((400 - h) // 2) - 15
+
+    # Draw finger lines
+    for t in range(0, 4, 1):
+        cv2.line(white, (pts[t][0] + os, pts[t][1] + os1),
+                 (pts[t + 1][0] + os, pts[t + 1][1] + os1), (0, 255, 0), 3)
+    for t in range(5, 8, 1):
+        cv2.line(white, (pts[t][0] + os, pts[t][1] + os1),
+                 (pts[t + 1][0] + os, pts[t + 1][1] + os1), (0, 255, 0), 3)
+    for t in range(9, 12, 1):
+        cv2.line(white, (pts[t][0] + os, pts[t][1] + os1),
+                 (pts[t + 1][0] + os, pts[t + 1][1] + os1), (0, 255, 0), 3)
+    for t in range(13, 16, 1):
+        cv2.line(white, (pts[t][0] + os, pts[t][1] + os1),
+                 (pts[t + 1][0] + os, pts[t + 1][1] + os1), (0, 255, 0), 3)
+    for t in range(17, 20, 1):
+        cv2.line(white, (pts[t][0] + os, pts[t][1] + os1),
+                 (pts[t + 1][0] + os, pts[t + 1][1] + os1), (0, 255, 0), 3)
+
+    # Draw palm lines
+    cv2.line(white, (pts[5][0] + os, pts[5][1] + os1),
+             (pts[9][0] + os, pts[9][1] + os1), (0, 255, 0), 3)
+    cv2.line(white, (pts[9][0] + os, pts[9][1] + os1),
+             (pts[13][0] + os, pts[13][1] + os1), (0, 255, 0), 3)
+    cv2.line(white, (pts[13][0] + os, pts[13][1] + os1),
+             (pts[17][0] + os, pts[17][1] + os1), (0, 255, 0), 3)
+    cv2.line(white, (pts[0][0] + os, pts[0][1] + os1),
+             (pts[5][0] + os, pts[5][1] + os1), (0, 255, 0), 3)
+    cv2.line(white, (pts[0][0] + os, pts[0][1] + os1),
+             (pts[17][0] + os, pts[17][1] + os1), (0, 255, 0), 3)
+
+    # Draw joints
+    for i in range(21):
+        cv2.circle(white, (pts[i][0] + os, pts[i][1] + os1), 2, (0, 0, 255), 1)
+    return white
+
+
+# Parent of each landmark along the bones drawn by render_skeleton, in the order
+# skeleton_landmarks assigns them (17 also connects back to the wrist)
+BONE_PARENT = {1: 0, 2: 1, 3: 2, 4: 3, 5: 0, 6: 5, 7: 6, 8: 7, 9: 5, 10: 9, 11: 10, 12: 11,
+               13: 9, 14: 13, 15: 14, 16: 15, 17: 13, 18: 17, 19: 18, 20: 19}
+
+# Same hand with index and pinky sides swapped (the bone graph cannot tell them apart)
+MIRRORED = [0, 1, 2, 3, 4, 17, 18, 19, 20, 13, 14, 15, 16, 9, 10, 11, 12, 5, 6, 7, 8]
+
+
+def skeleton_joints(image):
+    """Centres of the red joint circles on a skeleton canvas, as an (n, 2) float32 array"""
+    red = np.clip(image[..., 2].astype(np.float32) - image[..., 0], 0, None)
+    score = cv2.boxFilter(red, -1, (5, 5))
+    peaks = (score == cv2.dilate(score, np.ones((5, 5), np.uint8))) & (score > 15)
+    ys, xs = np.nonzero(peaks)
+    return np.stack([xs, ys], axis=1).astype(np.float32)
+
+
+def skeleton_bones(image, joints):
+    """
+    Which joints are joined by a drawn line
+    A line through two other joints in a row is dropped, it is a chain of bones
+    Returns: (n, n) bool adjacency matrix
+    """
+    ink = image.min(axis=2) < 160
+    n = len(joints)
+    lines = np.zeros((n, n), bool)
+    for i in range(n):
+        for j in range(i + 1, n):
+            steps = max(int(np.linalg.norm(joints[j] - joints[i])), 3)
+            t = np.linspace(0, 1, steps)[:, None]
+            q = np.rint(joints[i] + t * (joints[j] - joints[i])).astype(int)
+            lines[i, j] = lines[j, i] = ink[q[:, 1], q[:, 0]].mean() >= 0.9
+
+    bones = lines.copy()
+    for i in range(n):
+        for j in np.nonzero(lines[i])[0]:
+            v = joints[j] - joints[i]
+            vv = v @ v
+            if vv == 0:
+                continue
+            w = joints - joints[i]
+            along = (w @ v) / vv
+            across = np.abs(w[:, 0] * v[1] - w[:, 1] * v[0]) / np.sqrt(vv)
+            between = (along > 0) & (along < 1) & (across < 3) & lines[i]
+            between[[i, j]] = False
+            if between.sum() >= 2:
+                bones[i, j] = bones[j, i] = False
+    return bones
+
+
+def skeleton_landmarks(image, max_steps=20000):
+    """
+    Recover the 21 landmarks from a canvas drawn by render_skeleton (e.g. AtoZ_3.1)
+
+    Joints are the red circles; each is given a landmark number by fitting the
+    hand's bone graph onto the drawn lines, taking the fit with the shortest
+    bones. Up to two joints hidden under others are allowed. Joints that sit on
+    top of the same line can come back swapped, so this is best effort.
+
+    Returns: (21, 2) float32 canvas coordinates, or None if no fit was found
+    """
+    joints = skeleton_joints(image)
+    hidden = 21 - len(joints)
+    if not 0 <= hidden <= 2:
+        return None
+
+    bones = skeleton_bones(image, joints)
+    dist = np.linalg.norm(joints[:, None] - joints[None], axis=2)
+    nearest = [sorted(np.nonzero(bones[i])[0], key=lambda j: dist[i, j]) for i in range(len(joints))]
+    best = [None, np.inf]
+    steps = [0]
+
+    def fit(k, assigned, used, length, hidden):
+        steps[0] += 1
+        if length >= best[1] or steps[0] > max_steps:
+            return
+        if k == 21:
+            best[0], best[1] = list(assigned), length
+            return
+        parent = assigned[BONE_PARENT[k]]
+        for c in nearest[parent]:
+            reused = c in used
+            if reused and (not hidden or c == parent):
+                continue
+            step = dist[parent, c] + (20.0 if reused else 0.0)
+            if k == 17:
+                if not bones[c, assigned[0]]:
+                    continue
+                step += dist[c, assigned[0]]
+            assigned.append(c)
+            if reused:
+                fit(k + 1, assigned, used, length + step, hidden - 1)
+            else:
+                used.add(c)
+                fit(k + 1, assigned, used, length + step, hidden)
+                used.discard(c)
+            assigned.pop()
+
+    # The wrist is usually the lowest joint, trying it first finds a short fit early
+    for wrist in sorted(range(len(joints)), key=lambda i: -joints[i, 1]):
+        if len(nearest[wrist]) >= 3:
+            fit(1, [wrist], {wrist}, 0.0, hidden)
+    if best[0] is None:
+        return None
+
+    pts = joints[best[0]]
+    # The index knuckle is the one nearer the thumb
+    if np.linalg.norm(pts[17] - pts[2]) < np.linalg.norm(pts[5] - pts[2]):
+        pts = pts[MIRRORED]
+    return pts
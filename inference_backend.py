@@ -0,0 +1,166 @@
+"""
+Runtimes for the sign CNN, chosen by model file extension.
+
+    .h5 / .keras  Keras (float32 TensorFlow, the original model)
+    .tflite       TensorFlow Lite interpreter (tflite_runtime if installed,
+                  otherwise tf.lite), for the float16/int8 files written by
+                  convert_model.py
+    .onnx         onnxruntime
+
+Every backend has the predict(batch, batch_size=None, verbose=0) call the code
+already makes on the Keras model and returns float32 group probabilities, so
+load_backend() is a drop-in replacement for keras.models.load_model().
+
+`python convert_model.py --export` writes the float32 model next to the .h5 as
+<name>.tflite: a flatbuffer the interpreter memory-maps, with the inference
+graph already converted, so it loads without parsing HDF5 or tracing Keras.
+resolve_model_file() picks it over the .h5 while it is up to date.
+"""
+import os
+import threading
+
+import numpy as np
+
+BACKENDS = {'.h5': 'keras', '.keras': 'keras', '.tflite': 'tflite', '.onnx': 'onnx'}
+
+
+def backend_name(path):
+    return BACKENDS.get(os.path.splitext(path)[1].lower(), 'keras')
+
+
+def exported_path(path):
+    """Where convert_model.py --export puts the fast-loading copy of a Keras model"""
+    return os.path.splitext(path)[0] + '.tflite'
+
+
+def resolve_model_file(path):
+    """
+    The exported .tflite of a .h5/.keras path when it exists and is not older
+    than the Keras file, otherwise path itself
+    """
+    if backend_name(path) != 'keras':
+        return path
+    exported = exported_path(path)
+    if not os.path.exists(exported):
+        return path
+    if os.path.exists(path) and os.path.getmtime(exported) < os.path.getmtime(path):
+        print(f"{exported} is older than {path}, loading {path} (re-run convert_model.py --export)")
+        return path
+    return exported
+
+
+def load_backend(path, threads=None):
+    """Load the model at path with the runtime matching its extension"""
+    name = backend_name(path)
+    if name == 'tflite':
+        return TFLiteBackend(path, threads)
+    if name == 'onnx':
+        return ONNXBackend(path, threads)
+    return KerasBackend(path)
+
+
+class KerasBackend:
+    name = 'keras'
+
+    def __init__(self, path):
+        from keras.models import load_model
+        self.path = path
+        self.model = load_model(path)
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        return np.array(self.model.predict(batch, batch_size=batch_size, verbose=verbose), dtype='float32')
+
+
+class TFLiteBackend:
+    """
+    TFLite interpreters sized for 1, 2, 4, ... max_batch_size canvases.
+    Resizing an interpreter reallocates all of its tensors, and the scheduler's
+    batches change size from one call to the next, so a batch is split into
+    power-of-two chunks (11 = 8 + 2 + 1) that each go to the interpreter of
+    their size, allocated once when first needed. Padding up to a fixed size
+    would cost a forward pass per padded row, and an interpreter per exact
+    size would hold activation buffers for every size at once.
+    Interpreters are not thread safe, so calls to each are serialized
+    """
+    name = 'tflite'
+
+    def __init__(self, path, threads=None, max_batch_size=32):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+        self.path = path
+        self.threads = threads
+        # Largest power of two not over max_batch_size
+        self.max_batch_size = 1 << (max(1, max_batch_size).bit_length() - 1)
+        self._interpreter_class = Interpreter
+        self._slots = {}  # chunk size -> (interpreter, input detail, output detail, lock)
+        self._lock = threading.Lock()
+        _, self.input, self.output, _ = self._slot(1)
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        batch = np.asarray(batch)
+        outputs = []
+        first = 0
+        while first < len(batch):
+            size = min(self.max_batch_size, 1 << (len(batch) - first).bit_length() - 1)
+            outputs.append(self._run(batch[first:first + size]))
+            first += size
+        if not outputs:
+            return np.zeros((0,) + tuple(self.output['shape'][1:]), dtype='float32')
+        return np.concatenate(outputs)
+
+    def _run(self, chunk):
+        interpreter, input_detail, output_detail, lock = self._slot(len(chunk))
+        with lock:
+            interpreter.set_tensor(input_detail['index'], _quantize(chunk, input_detail))
+            interpreter.invoke()
+            return _dequantize(interpreter.get_tensor(output_detail['index']), output_detail)
+
+    def _slot(self, size):
+        with self._lock:
+            slot = self._slots.get(size)
+            if slot is None:
+                interpreter = self._interpreter_class(model_path=self.path, num_threads=self.threads)
+                detail = interpreter.get_input_details()[0]
+                if detail['shape'][0] != size:
+                    interpreter.resize_tensor_input(detail['index'], [size] + list(detail['shape'][1:]))
+                interpreter.allocate_tensors()
+                slot = self._slots[size] = (interpreter, interpreter.get_input_details()[0],
+                                            interpreter.get_output_details()[0], threading.Lock())
+            return slot
+
+
+class ONNXBackend:
+    name = 'onnx'
+
+    def __init__(self, path, threads=None):
+        import onnxruntime
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.path = path
+        self.session = onnxruntime.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch, batch_size=None, verbose=0):
+        batch = np.asarray(batch, dtype=np.float32)
+        return np.array(self.session.run(None, {self.input_name: batch})[0], dtype='float32')
+
+
+def _quantize(batch, detail):
+    """Convert a float batch to the interpreter's input type (int8/uint8 models use scale and zero point)"""
+    dtype = detail['dtype']
+    if np.issubdtype(dtype, np.integer):
+        scale, zero_point = detail['quantization']
+        info = np.iinfo(dtype)
+        return np.clip(np.rint(batch / scale + zero_point), info.min, info.max).astype(dtype)
+    return batch.astype(dtype)
+
+
+def _dequantize(values, detail):
+    if np.issubdtype(detail['dtype'], np.integer):
+        scale, zero_point = detail['quantization']
+        return ((values.astype(np.float32) - zero_point) * scale).astype('float32')
+    return np.array(values, dtype='float32')
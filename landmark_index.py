@@ -0,0 +1,99 @@
+"""
+Landmarks of the whole AtoZ_3.1 dataset in one compressed file.
+
+Recovers the 21 joints of every <letter>/*.jpg skeleton image
+(hand_skeleton.skeleton_landmarks) in a process pool and stores them as int16
+with the letter label, file path and a SHA-1 of each image. Reruns hash the
+images and only decode new or changed ones.
+
+    python landmark_index.py --dataset AtoZ_3.1 --out atoz_landmarks.npz
+
+Arrays in the file: landmarks (N, 21, 2) int16, valid (N,) bool - False where
+no skeleton could be fitted, labels (N,), paths (N,), hashes (N,).
+"""
+import argparse
+import glob
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from hand_skeleton import skeleton_landmarks
+
+LANDMARK_INDEX_FILE = 'atoz_landmarks.npz'
+
+
+def recover(buf):
+    """Landmarks of one encoded image as int16, or None"""
+    image = cv2.imdecode(np.frombuffer(buf, np.uint8), cv2.IMREAD_COLOR)
+    pts = skeleton_landmarks(image) if image is not None else None
+    return None if pts is None else np.rint(pts).astype(np.int16)
+
+
+def load_index(path=LANDMARK_INDEX_FILE):
+    """All arrays of an index file as a dict"""
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def update_index(dataset_dir='AtoZ_3.1', path=LANDMARK_INDEX_FILE, workers=None):
+    """
+    Bring the index at path up to date with the images in dataset_dir
+    Returns: the index dict (see load_index)
+    """
+    files = []
+    for letter in sorted(os.listdir(dataset_dir)):
+        if os.path.isdir(os.path.join(dataset_dir, letter)):
+            files += [(letter, p) for p in sorted(glob.glob(os.path.join(dataset_dir, letter, '*.jpg')))]
+
+    known = {}
+    if os.path.exists(path):
+        old = load_index(path)
+        known = {h: (pts, ok) for h, pts, ok in zip(old['hashes'], old['landmarks'], old['valid'])}
+
+    buffers, hashes = [], []
+    for _, file_path in files:
+        with open(file_path, 'rb') as f:
+            buf = f.read()
+        buffers.append(buf)
+        hashes.append(hashlib.sha1(buf).hexdigest())
+
+    todo = [i for i, h in enumerate(hashes) if h not in known]
+    start = time.perf_counter()
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunksize = max(1, len(todo) // (4 * (workers or os.cpu_count() or 1)))
+            for i, pts in zip(todo, pool.map(recover, [buffers[i] for i in todo], chunksize=chunksize)):
+                known[hashes[i]] = (np.zeros((21, 2), np.int16) if pts is None else pts, pts is not None)
+    print(f"{len(files)} images, {len(todo)} new or changed, decoded in {time.perf_counter() - start:.1f}s")
+
+    index = {
+        'landmarks': np.array([known[h][0] for h in hashes], dtype=np.int16).reshape(-1, 21, 2),
+        'valid': np.array([known[h][1] for h in hashes], dtype=bool),
+        'labels': np.array([letter for letter, _ in files]),
+        'paths': np.array([os.path.relpath(p, dataset_dir) for _, p in files]),
+        'hashes': np.array(hashes),
+    }
+    np.savez_compressed(path, **index)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dataset', default='AtoZ_3.1')
+    parser.add_argument('--out', default=LANDMARK_INDEX_FILE)
+    parser.add_argument('--workers', type=int, help='processes (default: one per CPU)')
+    args = parser.parse_args()
+
+    index = update_index(args.dataset, args.out, args.workers)
+    for letter in np.unique(index['labels']):
+        of_letter = index['labels'] == letter
+        print(f"{letter}: {index['valid'][of_letter].sum()}/{of_letter.sum()} recovered")
+    print(f"Saved {args.out} ({os.path.getsize(args.out) / 1024:.0f} KB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Landmark-only classifier: predicts the 8 letter groups from the 21 hand
+landmarks instead of rendering them on a 400x400 canvas and running the CNN.
+
+Training uses Keras; the trained weights are saved to a small .npz file and
+inference is two hidden layers in plain NumPy, so the server and desktop app
+can use it without TensorFlow in the hot path. The output is the same 8-group
+probability vector the CNN produces, so the rules in sign_rules.py apply
+unchanged.
+
+    python landmark_model.py --data landmarks_dataset.npz --out landmark_model.npz
+"""
+import argparse
+
+import numpy as np
+
+LANDMARK_MODEL_FILE = 'landmark_model.npz'
+
+# The CNN's 8 groups, as used by the rules
+LETTER_GROUPS = {}
+for _group, _letters in enumerate(['AEMNST', 'BDFIKRUVW', 'CO', 'GH', 'L', 'PQZ', 'X', 'JY']):
+    for _letter in _letters:
+        LETTER_GROUPS[_letter] = _group
+
+
+def normalize_landmarks(pts):
+    """
+    Make landmarks independent of hand position and size
+    pts: (21, 2+) for one hand or (N, 21, 2+) for a batch
+    Returns: (N, 42) float32 - wrist at the origin, largest coordinate 1
+    """
+    pts = np.asarray(pts, dtype=np.float32)
+    if pts.ndim == 2:
+        pts = pts[None]
+    pts = pts[:, :21, :2] - pts[:, :1, :2]
+    scale = np.abs(pts).reshape(len(pts), -1).max(axis=1)
+    scale[scale == 0] = 1
+    return (pts / scale[:, None, None]).reshape(len(pts), 42)
+
+
+class LandmarkClassifier:
+    """NumPy forward pass of the trained landmark MLP"""
+
+    def __init__(self, path=LANDMARK_MODEL_FILE):
+        weights = np.load(path)
+        count = len([k for k in weights.files if k.startswith('w')])
+        self.layers = [(weights[f'w{i}'], weights[f'b{i}']) for i in range(count)]
+
+    def predict(self, pts):
+        """
+        Group probabilities for a batch of hands
+        pts: list of landmark lists or an (N, 21, 2+) array
+        Returns: (N, 8) float32
+        """
+        x = normalize_landmarks(pts)
+        for i, (w, b) in enumerate(self.layers):
+            x = x @ w + b
+            if i < len(self.layers) - 1:
+                x = np.maximum(x, 0)
+        x = np.exp(x - x.max(axis=1, keepdims=True))
+        return (x / x.sum(axis=1, keepdims=True)).astype(np.float32)
+
+
+def train(landmarks, labels, out_path=LANDMARK_MODEL_FILE, epochs=60, hidden=64, seed=0):
+    """
+    Train the MLP on landmark arrays labelled with letters and save its weights
+    Returns the validation accuracy on the held-out 10%
+    """
+    from keras import layers, models
+
+    x = normalize_landmarks(landmarks)
+    y = np.array([LETTER_GROUPS[str(label).upper()] for label in labels])
+
+    rng = np.random.RandomState(seed)
+    order = rng.permutation(len(x))
+    split = int(len(x) * 0.9)
+    train_idx, val_idx = order[:split], order[split:]
+
+    model = models.Sequential([
+        layers.Input(shape=(42,)),
+        layers.Dense(hidden, activation='relu'),
+        layers.Dense(hidden, activation='relu'),
+        layers.Dense(8, activation='softmax'),
+    ])
+    model.compile(optimizer='adam', loss='sparse_categorical_crossentropy', metrics=['accuracy'])
+    model.fit(x[train_idx], y[train_idx], epochs=epochs, batch_size=64,
+              validation_data=(x[val_idx], y[val_idx]), verbose=2)
+
+    weights = {}
+    for i, layer in enumerate(model.layers):
+        w, b = layer.get_weights()
+        weights[f'w{i}'] = w.astype(np.float32)
+        weights[f'b{i}'] = b.astype(np.float32)
+    np.savez(out_path, **weights)
+
+    predicted = LandmarkClassifier(out_path).predict(x[val_idx]).argmax(axis=1)
+    return float((predicted == y[val_idx]).mean()) if len(val_idx) else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default='landmarks_dataset.npz',
+                        help="npz with 'landmarks' (N, 21, 2) and 'labels' (N,) letters, "
+                             "e.g. from data_collection_landmarks.py or landmark_index.py")
+    parser.add_argument('--out', default=LANDMARK_MODEL_FILE)
+    parser.add_argument('--epochs', type=int, default=60)
+    args = parser.parse_args()
+
+    data = np.load(args.data)
+    landmarks, labels = data['landmarks'], data['labels']
+    if 'valid' in data.files:
+        # A landmark_index.py file, skip images no skeleton was recovered from
+        landmarks, labels = landmarks[data['valid']], labels[data['valid']]
+    accuracy = train(landmarks, labels, args.out, epochs=args.epochs)
+    print(f"Saved {args.out} - validation group accuracy {accuracy:.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Compare single-pass and two-pass landmark extraction on the same frames.
+
+Runs find_hand_landmarks in both modes on every frame of a video, a camera or a
+folder of photos, and reports how far the single-pass landmarks and canvases
+drift from the two-pass ones (and, with --model, whether the CNN still picks the
+same groups), plus the time each mode takes.
+
+    python landmark_parity.py --video clip.mp4
+    python landmark_parity.py --images photos/ --model cnn8grps_rad1_model.h5 --json parity.json
+"""
+import argparse
+import glob
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+from cvzone.HandTrackingModule import HandDetector
+
+from hand_skeleton import find_hand_landmarks, render_skeleton
+
+
+def iter_frames(args):
+    if args.images:
+        paths = sorted(p for p in glob.glob(os.path.join(args.images, '*'))
+                       if p.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp')))
+        for path in paths[:args.max_frames]:
+            frame = cv2.imread(path)
+            if frame is not None:
+                yield frame
+        return
+
+    capture = cv2.VideoCapture(args.video if args.video else args.camera)
+    try:
+        count = 0
+        while count < args.max_frames:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            count += 1
+            yield frame
+    finally:
+        capture.release()
+
+
+def top2(model, canvas):
+    prob = np.array(model.predict(canvas.reshape(1, 400, 400, 3), verbose=0)[0], dtype='float32')
+    order = np.argsort(prob)[::-1]
+    return int(order[0]), int(order[1])
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--video', help='video file to read frames from')
+    source.add_argument('--images', help='folder of photos to use as frames')
+    source.add_argument('--camera', type=int, default=0, help='camera index (default 0)')
+    parser.add_argument('--max-frames', type=int, default=500)
+    parser.add_argument('--model', help='also compare CNN groups using this model (.h5, .tflite or .onnx)')
+    parser.add_argument('--json', help='write the report to this file')
+    args = parser.parse_args()
+
+    model = None
+    if args.model:
+        from inference_backend import load_backend
+        model = load_backend(args.model)
+
+    # Separate detectors per mode so tracking state from one mode never feeds the other.
+    # Photos are unrelated stills: static image mode, so no result depends on the
+    # previous file's hand region (and the report not on file order)
+    static = bool(args.images)
+    two_pass = (HandDetector(staticMode=static, maxHands=1), HandDetector(staticMode=static, maxHands=1))
+    single_pass = HandDetector(staticMode=static, maxHands=1)
+
+    frames = detected_two = detected_single = 0
+    time_two, time_single = [], []
+    deviation_mean, deviation_max, canvas_mismatch = [], [], []
+    group_match = pair_match = compared = 0
+
+    for frame in iter_frames(args):
+        frames += 1
+
+        start = time.perf_counter()
+        pts_two, w, h = find_hand_landmarks(frame, two_pass[0], two_pass[1], mode='two_pass')
+        time_two.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        pts_single, w1, h1 = find_hand_landmarks(frame, single_pass, None, mode='single_pass')
+        time_single.append((time.perf_counter() - start) * 1000)
+
+        ok_two = pts_two is not None and len(pts_two) >= 21
+        ok_single = pts_single is not None and len(pts_single) >= 21
+        detected_two += ok_two
+        detected_single += ok_single
+        if not (ok_two and ok_single):
+            continue
+
+        diff = np.abs(np.array(pts_two)[:, :2] - np.array(pts_single)[:, :2])
+        deviation_mean.append(float(diff.mean()))
+        deviation_max.append(float(diff.max()))
+
+        canvas_two = render_skeleton(pts_two, w, h)
+        canvas_single = render_skeleton(pts_single, w1, h1)
+        canvas_mismatch.append(float(np.any(canvas_two != canvas_single, axis=2).mean()))
+
+        if model is not None:
+            groups_two = top2(model, canvas_two)
+            groups_single = top2(model, canvas_single)
+            compared += 1
+            group_match += groups_two[0] == groups_single[0]
+            pair_match += groups_two == groups_single
+
+    report = {
+        'frames': frames,
+        'detected_two_pass': detected_two,
+        'detected_single_pass': detected_single,
+        'compared': len(deviation_mean),
+        'landmark_deviation_px': {
+            'mean': float(np.mean(deviation_mean)) if deviation_mean else 0.0,
+            'p95': percentile(deviation_mean, 95),
+            'max': max(deviation_max) if deviation_max else 0.0,
+        },
+        'canvas_mismatch_fraction': {
+            'mean': float(np.mean(canvas_mismatch)) if canvas_mismatch else 0.0,
+            'p95': percentile(canvas_mismatch, 95),
+        },
+        'latency_ms': {
+            'two_pass': {'p50': percentile(time_two, 50), 'p95': percentile(time_two, 95)},
+            'single_pass': {'p50': percentile(time_single, 50), 'p95': percentile(time_single, 95)},
+        },
+    }
+    if model is not None:
+        report['cnn_agreement'] = {
+            'top1': group_match / compared if compared else 0.0,
+            'top2_pair': pair_match / compared if compared else 0.0,
+        }
+
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
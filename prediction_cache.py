@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class PredictionCache:
+    """
+    LRU cache of CNN group probabilities keyed on quantized hand landmarks.
+
+    The canvas the CNN sees is drawn from the 21 landmarks and the first-pass
+    bbox size alone (render_skeleton), so a hand held still gives the same
+    canvas frame after frame. Landmarks and size are snapped to a grid of
+    `grid` pixels, and hands that land in the same cells share one model
+    result; the letter rules still run on the exact landmarks.
+
+    Entries belong to a session (None for requests without one). A session
+    keeps at most per_session entries and all sessions together at most
+    max_entries, the least recently used going first. Entries older than ttl
+    seconds are dropped.
+    """
+
+    def __init__(self, max_entries=1024, per_session=64, ttl=30.0, grid=4):
+        self.max_entries = max_entries
+        self.per_session = per_session
+        self.ttl = ttl
+        self.grid = max(1, grid)
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (session id, key) -> (probabilities, stored at)
+        self._sessions = {}  # session id -> OrderedDict of its keys, least recently used first
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evicted = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.per_session > 0
+
+    def key(self, pts, size):
+        """Grid cells of the 21 (x, y) landmarks and of the bbox (w, h)"""
+        cells = np.floor_divide(np.asarray(pts, dtype=np.int32)[:, :2], self.grid)
+        return cells.astype(np.int16).tobytes(), int(size[0]) // self.grid, int(size[1]) // self.grid
+
+    def get(self, session_id, key):
+        """Cached probabilities for key in this session, or None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get((session_id, key))
+            if entry is not None and now - entry[1] > self.ttl:
+                self._remove(session_id, key)
+                self._expired += 1
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end((session_id, key))
+            self._sessions[session_id].move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, session_id, key, probabilities):
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if (session_id, key) in self._entries:
+                self._remove(session_id, key)
+            keys = self._sessions.setdefault(session_id, OrderedDict())
+            while len(keys) >= self.per_session:
+                self._remove(session_id, next(iter(keys)))
+                self._evicted += 1
+            while len(self._entries) >= self.max_entries:
+                self._remove(*next(iter(self._entries)))
+                self._evicted += 1
+            self._entries[(session_id, key)] = (probabilities, now)
+            self._sessions.setdefault(session_id, keys)[key] = None
+
+    def close(self, session_id):
+        """Drop the entries of a session that has ended"""
+        with self._lock:
+            for key in list(self._sessions.get(session_id, ())):
+                self._remove(session_id, key)
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'sessions': len(self._sessions),
+                'max_entries': self.max_entries,
+                'per_session': self.per_session,
+                'ttl_seconds': self.ttl,
+                'grid': self.grid,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / lookups if lookups else 0.0,
+                'expired': self._expired,
+                'evicted': self._evicted,
+            }
+
+    def _remove(self, session_id, key):
+        del self._entries[(session_id, key)]
+        keys = self._sessions[session_id]
+        del keys[key]
+        if not keys:
+            del self._sessions[session_id]
+
+    def _expire(self, now):
+        # Least recently used first: stop at the first entry that is still fresh
+        while self._entries:
+            (session_id, key), (_, stored) = next(iter(self._entries.items()))
+            if now - stored <= self.ttl:
+                break
+            self._remove(session_id, key)
+            self._expired += 1
@@ -1,557 +1,571 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, send_file
 from flask_cors import CORS
 import base64, cv2, numpy as np, io
 import os
-import math
+import json
+import threading
+import time
+import uuid
 from PIL import Image
-import pyttsx3
-from keras.models import load_model
-from cvzone.HandTrackingModule import HandDetector
-
-# Check if model file exists
-MODEL_FILE = 'cnn8grps_rad1_model.h5'
+from audio_cache import AudioCache, normalize_text
+from batch_scheduler import InferenceScheduler, SchedulerBusy
+from detector_pool import DetectorPool
+from frame_pipeline import DETECT_WIDTH, Frame
+from inference_backend import backend_name, load_backend, resolve_model_file
+from hand_skeleton import LANDMARK_MODES, find_hand_landmarks, render_skeleton
+from landmark_model import LANDMARK_MODEL_FILE, LandmarkClassifier
+from metrics import Registry
+from prediction_cache import PredictionCache
+from sessions import SessionStore
+from sign_rules import SignRuleEngine
+from tts_worker import VOICE_SETTINGS, SpeechQueueFull, SpeechWorker
+from template_matcher import TEMPLATE_INDEX_FILE, TemplateMatcher
+
+try:
+    from flask_sock import Sock
+except ImportError:
+    Sock = None
+
+# 'cnn' renders the landmarks on a 400x400 canvas for the CNN,
+# 'landmark' feeds the landmarks straight to the small model from landmark_model.py,
+# 'template' picks the letter of the nearest AtoZ_3.1 templates (template_matcher.py)
+INFERENCE_ENGINE = os.environ.get('INFERENCE_ENGINE', 'cnn')
+if INFERENCE_ENGINE not in ('cnn', 'landmark', 'template'):
+    print(f"Unknown INFERENCE_ENGINE '{INFERENCE_ENGINE}', using 'cnn'")
+    INFERENCE_ENGINE = 'cnn'
+
+# .h5 runs on Keras; a .tflite/.onnx file from convert_model.py runs on its lighter runtime
+# An up-to-date <name>.tflite from convert_model.py --export is used in place of <name>.h5
+MODEL_FILE = resolve_model_file(os.environ.get('MODEL_FILE', 'cnn8grps_rad1_model.h5'))
+MODEL_THREADS = int(os.environ.get('MODEL_THREADS', 0)) or None
 model = None
 classes = list("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
 
-if os.path.exists(MODEL_FILE):
-    try:
-        print(f"Loading model from {MODEL_FILE}...")
-        model = load_model(MODEL_FILE)
+LANDMARK_MODEL_FILE = os.environ.get('LANDMARK_MODEL_FILE', LANDMARK_MODEL_FILE)
+landmark_classifier = None
+
+TEMPLATE_INDEX_FILE = os.environ.get('TEMPLATE_INDEX_FILE', TEMPLATE_INDEX_FILE)
+template_matcher = None
+
+if INFERENCE_ENGINE == 'landmark':
+    MODEL_FILE = LANDMARK_MODEL_FILE
+elif INFERENCE_ENGINE == 'template':
+    MODEL_FILE = TEMPLATE_INDEX_FILE
+
+# The model, MediaPipe and their warm-up load in a background thread so the
+# port is bound right away; BACKGROUND_LOAD=0 loads them before serving instead
+BACKGROUND_LOAD = os.environ.get('BACKGROUND_LOAD', '1') != '0'
+PORT = int(os.environ.get('PORT', 5000))
+
+# 'starting' -> 'ready', or 'failed' when the model could not be loaded
+startup = {'state': 'starting', 'error': None, 'seconds': {}}
+STARTED_AT = time.perf_counter()
+
+def load_engine():
+    """Load the model for INFERENCE_ENGINE into its global"""
+    global model, landmark_classifier, template_matcher
+    if not os.path.exists(MODEL_FILE):
+        if INFERENCE_ENGINE == 'landmark':
+            hint = "Train one with: python landmark_model.py --data landmarks_dataset.npz"
+        elif INFERENCE_ENGINE == 'template':
+            hint = "Build one with: python template_matcher.py build --dataset AtoZ_3.1"
+        else:
+            hint = "Please ensure the model file is in the root directory."
+        raise FileNotFoundError(f"Model file '{MODEL_FILE}' not found! {hint}")
+
+    if INFERENCE_ENGINE == 'landmark':
+        print(f"Loading landmark model from {LANDMARK_MODEL_FILE}...")
+        landmark_classifier = LandmarkClassifier(LANDMARK_MODEL_FILE)
+        print("Landmark model loaded successfully!")
+    elif INFERENCE_ENGINE == 'template':
+        print(f"Loading templates from {TEMPLATE_INDEX_FILE}...")
+        template_matcher = TemplateMatcher.load(TEMPLATE_INDEX_FILE)
+        print(f"{len(template_matcher.templates)} templates loaded!")
+    else:
+        print(f"Loading model from {MODEL_FILE} ({backend_name(MODEL_FILE)})...")
+        model = load_backend(MODEL_FILE, MODEL_THREADS)
         print("Model loaded successfully!")
-    except Exception as e:
-        print(f"Error loading model: {e}")
-        print("Server will run but predictions will not work.")
-else:
-    print(f"ERROR: Model file '{MODEL_FILE}' not found!")
-    print("Please ensure the model file is in the root directory.")
-    print("Server will start but predictions will return errors.")
+
+def warm_up():
+    """
+    One throwaway prediction and one MediaPipe pass, so the first request does
+    not pay for graph setup (TensorFlow tracing, TFLite allocation, MediaPipe init)
+    """
+    pts = [[i * 10, i * 10] for i in range(21)]
+    if INFERENCE_ENGINE == 'landmark':
+        landmark_classifier.predict([pts])
+    elif INFERENCE_ENGINE == 'template':
+        template_matcher.classify(pts)
+    else:
+        model.predict(np.ones((1, 400, 400, 3), np.uint8) * 255, verbose=0)
+    with detectors.checkout() as (hd, hd2):
+        hd.findHands(np.zeros((240, 320, 3), np.uint8), draw=False, flipType=True)
+
+def start_up():
+    """Load and warm up everything a prediction needs, recording how long each step took"""
+    for name, step in (('load_model', load_engine), ('warm_up', warm_up)):
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            print(f"Error during {name}: {e}")
+            print("Server will run but predictions will return errors.")
+            startup.update(state='failed', error=str(e))
+            return
+        finally:
+            startup['seconds'][name] = time.perf_counter() - started
+    startup['seconds']['total'] = time.perf_counter() - STARTED_AT
+    startup['state'] = 'ready'
+    print(f"Ready to predict {startup['seconds']['total']:.1f}s after start")
+
+def engine_ready():
+    """True when the model for INFERENCE_ENGINE is loaded"""
+    if INFERENCE_ENGINE == 'landmark':
+        return landmark_classifier is not None
+    if INFERENCE_ENGINE == 'template':
+        return template_matcher is not None
+    return model is not None
+
+def not_ready_response():
+    """503 for prediction requests that arrive before start_up() has finished"""
+    if startup['state'] == 'starting':
+        response = jsonify({'error': 'Model loading', 'message': 'The server is still starting, retry shortly'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    return jsonify(MODEL_NOT_LOADED), 503
+
+MODEL_NOT_LOADED = {
+    'error': 'Model not loaded',
+    'message': f'Please ensure {MODEL_FILE} exists in the root directory'
+}
 
 app = Flask(__name__)
 CORS(app)
-tts = pyttsx3.init()
+sock = Sock(app) if Sock is not None else None
+def hand_detector(**kwargs):
+    """A cvzone HandDetector; cvzone and MediaPipe are imported on first use"""
+    from cvzone.HandTrackingModule import HandDetector
+    return HandDetector(**kwargs)
+
+# Pool of (hd, hd2) hand detector pairs, one pair per request at a time. Pooled
+# pairs see unrelated frames from different clients, so they run MediaPipe in
+# static image mode and detect the palm on every frame
+DETECTOR_POOL_SIZE = int(os.environ.get('DETECTOR_POOL_SIZE', 4))
+detectors = DetectorPool(lambda: hand_detector(staticMode=True, maxHands=1), DETECTOR_POOL_SIZE)
+
+# Clients sending an X-Session-Id header get their own tracking-mode detectors
+SESSION_HEADER = 'X-Session-Id'
+MAX_SESSIONS = int(os.environ.get('MAX_SESSIONS', 32))
+SESSION_TTL = float(os.environ.get('SESSION_TTL', 60))
+TRACKING_CONFIDENCE = float(os.environ.get('TRACKING_CONFIDENCE', 0.5))
+sessions = SessionStore(lambda: hand_detector(staticMode=False, maxHands=1, minTrackCon=TRACKING_CONFIDENCE),
+                        max_sessions=MAX_SESSIONS, ttl=SESSION_TTL)
+
+# 'two_pass' re-detects the hand on the crop like final_pred.py,
+# 'single_pass' reuses the first-pass landmarks (MediaPipe runs once per frame)
+LANDMARK_MODE = os.environ.get('LANDMARK_MODE', 'two_pass')
+if LANDMARK_MODE not in LANDMARK_MODES:
+    print(f"Unknown LANDMARK_MODE '{LANDMARK_MODE}', using 'two_pass'")
+    LANDMARK_MODE = 'two_pass'
+
+# Frames per /predict_batch request and per forward pass inside it
+MAX_BATCH_FRAMES = int(os.environ.get('MAX_BATCH_FRAMES', 256))
+PREDICT_BATCH_SIZE = int(os.environ.get('PREDICT_BATCH_SIZE', 32))
+
+# Cross-request micro-batching for /predict and /detect
+BATCH_WINDOW_MS = float(os.environ.get('BATCH_WINDOW_MS', 5))
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 16))
+MAX_QUEUE_DEPTH = int(os.environ.get('MAX_QUEUE_DEPTH', 256))
+
+# A session frame whose thumbnail differs from the last analysed one by at most
+# STATIC_FRAME_THRESHOLD gray levels everywhere gets the last answer back, for up
+# to STATIC_FRAME_MAX_AGE seconds after it was computed (0 turns this off)
+STATIC_FRAME_THRESHOLD = int(os.environ.get('STATIC_FRAME_THRESHOLD', 8))
+STATIC_FRAME_MAX_AGE = float(os.environ.get('STATIC_FRAME_MAX_AGE', 1.0))
+
+# CNN results of recently seen hand poses, keyed on landmarks snapped to a
+# PREDICTION_CACHE_GRID pixel grid; PREDICTION_CACHE_SIZE=0 turns it off
+PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', 1024))
+PREDICTION_CACHE_PER_SESSION = int(os.environ.get('PREDICTION_CACHE_PER_SESSION', 64))
+PREDICTION_CACHE_TTL = float(os.environ.get('PREDICTION_CACHE_TTL', 30))
+PREDICTION_CACHE_GRID = int(os.environ.get('PREDICTION_CACHE_GRID', 4))
+prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_PER_SESSION,
+                                   ttl=PREDICTION_CACHE_TTL, grid=PREDICTION_CACHE_GRID)
+
+# Prometheus metrics served on /metrics
+registry = Registry()
+STAGE_SECONDS = registry.histogram('signspeak_stage_seconds', 'Time spent in each stage of a prediction', ['stage'])
+REQUEST_SECONDS = registry.histogram('signspeak_request_seconds', 'Time to answer a request', ['endpoint'])
+IN_FLIGHT = registry.gauge('signspeak_requests_in_flight', 'Requests being answered', ['endpoint'])
+FRAMES = registry.counter('signspeak_frames_total', 'Frames searched for a hand', ['hand'])
+BATCH_QUEUE = registry.gauge('signspeak_scheduler_queue_depth', 'Canvases waiting for the model')
+STATIC_FRAMES = registry.counter('signspeak_static_frames_total', 'Session frames answered with the previous result')
+TTS_QUEUE = registry.gauge('signspeak_tts_queue_depth', 'Utterances waiting to be spoken')
+TTS_JOBS = registry.counter('signspeak_tts_jobs_total', 'Speech requests by outcome', ['result'])
+TTS_SECONDS = registry.histogram('signspeak_tts_seconds', 'Time spent speaking one utterance',
+                                 buckets=(0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+CACHE_LOOKUPS = registry.counter('signspeak_prediction_cache_total', 'CNN prediction cache lookups', ['result'])
+CACHE_ENTRIES = registry.gauge('signspeak_prediction_cache_entries', 'CNN results held in the prediction cache')
+AUDIO_LOOKUPS = registry.counter('signspeak_tts_cache_total', 'Rendered speech cache lookups', ['result'])
+AUDIO_BYTES = registry.gauge('signspeak_tts_cache_bytes', 'Bytes of rendered speech on disk')
+
+def speech_engine():
+    """pyttsx3 starts the platform speech engine, imported only once something is spoken"""
+    import pyttsx3
+    return pyttsx3.init()
+
+def speech_finished(job):
+    TTS_JOBS.inc(result=job.state)
+    if job.started_at is not None:
+        TTS_SECONDS.observe(job.finished_at - job.started_at)
+
+# Speech runs on its own thread, at most TTS_QUEUE_SIZE utterances wait for it
+TTS_QUEUE_SIZE = int(os.environ.get('TTS_QUEUE_SIZE', 8))
+speech = SpeechWorker(speech_engine, max_queue=TTS_QUEUE_SIZE, on_finish=speech_finished)
+
+# Speech rendered by /tts is kept on disk, the least recently played going once
+# the files take more than TTS_CACHE_MAX_MB
+TTS_CACHE_DIR = os.environ.get('TTS_CACHE_DIR', 'tts_cache')
+TTS_CACHE_MAX_MB = float(os.environ.get('TTS_CACHE_MAX_MB', 64))
+TTS_RENDER_TIMEOUT = float(os.environ.get('TTS_RENDER_TIMEOUT', 30))
+TTS_MAX_CHARS = int(os.environ.get('TTS_MAX_CHARS', 500))
+audio_cache = AudioCache(TTS_CACHE_DIR, max_bytes=int(TTS_CACHE_MAX_MB * 2 ** 20))
+
+def voice_settings(data):
+    """rate (words per minute), volume (0-1) and voice id from a request, those given only"""
+    settings = {}
+    for name in VOICE_SETTINGS:
+        value = data.get(name)
+        if value is None or value == '':
+            continue
+        if name == 'rate':
+            value = int(value)
+        elif name == 'volume':
+            value = float(value)
+            if not 0 <= value <= 1:
+                raise ValueError('volume must be between 0 and 1')
+        else:
+            value = str(value)
+        settings[name] = value
+    return settings
+
+def render_speech(text, settings, path):
+    """Write text as audio to path on the speech worker, waiting up to TTS_RENDER_TIMEOUT"""
+    job, _ = speech.submit(text, output=path, settings=settings)
+    if not job.wait(TTS_RENDER_TIMEOUT):
+        speech.cancel(job.id)
+        raise TimeoutError(f'speech render took over {TTS_RENDER_TIMEOUT}s')
+    if job.state != 'done':
+        raise RuntimeError(job.error or f'speech render {job.state}')
+
+def stage(name):
+    """Context manager timing one pipeline stage into signspeak_stage_seconds"""
+    return STAGE_SECONDS.time(stage=name)
+
+def decode_image(data_url, session=None):
+    """Decode a base64 data URL into a Frame (see frame_pipeline.py)"""
+    with stage('base64_decode'):
+        img_data = base64.b64decode(data_url.split(',')[1])
+    frame = decode_image_bytes(img_data, session)
+    if frame is None:
+        # Formats OpenCV can't read (GIF, ...)
+        with stage('image_decode'):
+            img = Image.open(io.BytesIO(img_data)).convert('RGB')
+            frame = Frame.from_image(cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR))
+    return frame
+
+def decode_image_bytes(buf, session=None):
+    """
+    Decode raw JPEG/PNG bytes into a Frame (None if undecodable): reduced
+    resolution for palm detection, full resolution only for the hand crop
+    A session that tracked a hand in its last frame gets one full decode instead
+    """
+    with stage('image_decode'):
+        return Frame.decode(buf, hand_expected=session is not None and session.last_hand is not None)
 
-# Initialize hand detectors
-hd = HandDetector(maxHands=1)
-hd2 = HandDetector(maxHands=1)
-offset = 29
+def read_request_frame():
+    """
+    Read the frame sent with the current request
+    Accepts a raw image body (image/jpeg, image/png, application/octet-stream),
+    a multipart upload with an 'image' file, or JSON {"image": data URL}
+    Returns: (frame, error) - frame is None when no usable image was sent
+    """
+    if request.mimetype.startswith('image/') or request.mimetype == 'application/octet-stream':
+        buf = request.get_data()
+    elif request.mimetype == 'multipart/form-data':
+        if 'image' not in request.files:
+            return None, 'no image provided'
+        buf = request.files['image'].read()
+    else:
+        data = request.get_json(silent=True)
+        if not data or 'image' not in data:
+            return None, 'no image provided'
+        return decode_image(data['image'], current_session()), None
+
+    if not buf:
+        return None, 'no image provided'
+    frame = decode_image_bytes(buf, current_session())
+    if frame is None:
+        return None, 'Invalid frame received'
+    return frame, None
+
+def run_model(canvases):
+    """
+    Run the CNN on a list of 400x400 white canvases in a single predict call
+    Returns one probability vector per canvas
+    """
+    if model is None:
+        raise ValueError(f"Model not loaded. Please ensure '{MODEL_FILE}' exists in the root directory.")
+
+    batch = np.stack(canvases).reshape(len(canvases), 400, 400, 3)
+    # One observation per batch; model_wait below is the per-request view
+    with stage('model_predict'):
+        return np.array(model.predict(batch, batch_size=PREDICT_BATCH_SIZE, verbose=0), dtype='float32')
+
+rule_engine = SignRuleEngine('server')
+
+scheduler = InferenceScheduler(run_model, max_batch_size=MAX_BATCH_SIZE,
+                               batch_window_ms=BATCH_WINDOW_MS, max_queue_depth=MAX_QUEUE_DEPTH)
 
-def distance(x, y):
-    """Calculate Euclidean distance between two points"""
-    return math.sqrt(((x[0] - y[0]) ** 2) + ((x[1] - y[1]) ** 2))
+def cache_owner(session):
+    """prediction_cache owner of a session's entries, None for requests without one"""
+    return session.id if session is not None else None
 
-def predict_sign_advanced(white_canvas, pts):
+def lookup_prediction(owner, pts, size):
+    """
+    CNN probabilities cached for this hand pose by owner (a session id, see cache_owner)
+    Returns: (probabilities or None, cache key or None when the cache is off)
+    """
+    if not prediction_cache.enabled or size is None:
+        return None, None
+    key = prediction_cache.key(pts, size)
+    prob = prediction_cache.get(owner, key)
+    CACHE_LOOKUPS.inc(result='miss' if prob is None else 'hit')
+    return prob, key
+
+def store_prediction(owner, key, prob):
+    if key is not None:
+        prediction_cache.put(owner, key, prob)
+
+def predict_groups(pts_list, sizes, owner=None):
+    """
+    Group probabilities for many hands with the configured engine
+    For the CNN, canvases are drawn from pts and the bbox sizes only for hands
+    not in prediction_cache, and repeated poses within the list run once
+    """
+    if INFERENCE_ENGINE == 'landmark':
+        if landmark_classifier is None:
+            raise ValueError(f"Landmark model not loaded. Please ensure '{LANDMARK_MODEL_FILE}' exists in the root directory.")
+        with stage('model_predict'):
+            return landmark_classifier.predict(pts_list)
+
+    probs = [None] * len(pts_list)
+    keys = [None] * len(pts_list)
+    misses = {}  # key (or index when uncached) -> indices sharing it
+    for i, (pts, size) in enumerate(zip(pts_list, sizes)):
+        probs[i], keys[i] = lookup_prediction(owner, pts, size)
+        if probs[i] is None:
+            misses.setdefault(keys[i] if keys[i] is not None else i, []).append(i)
+    if misses:
+        canvases = []
+        for indices in misses.values():
+            with stage('draw_skeleton'):
+                canvases.append(render_skeleton(pts_list[indices[0]], *sizes[indices[0]]))
+        for indices, prob in zip(misses.values(), run_model(canvases)):
+            store_prediction(owner, keys[indices[0]], prob)
+            for i in indices:
+                probs[i] = prob
+    return np.array(probs, dtype='float32')
+
+def predict_sign_advanced(white_canvas, pts, size=None, owner=None):
     """
     Advanced prediction using the same logic as final_pred.py
     Uses white canvas image and hand landmarks for accurate detection
+    With the 'landmark' and 'template' engines white_canvas is not needed and may be None
+    With size, the (w, h) the canvas is drawn with, the CNN result is looked up in
+    prediction_cache first (entries of owner) and white_canvas may be None: it is drawn on a miss
     """
-    if model is None:
-        raise ValueError("Model not loaded. Please ensure 'cnn8grps_rad1_model.h5' exists in the root directory.")
+    if not engine_ready():
+        raise ValueError(f"Model not loaded. Please ensure '{MODEL_FILE}' exists in the root directory.")
     
     if pts is None or len(pts) < 21:
         return '—', 0.0
     
-    # Reshape white canvas for prediction (same as final_pred.py)
-    white = white_canvas.copy()
-    white = white.reshape(1, 400, 400, 3)
-    
-    # Get model prediction
-    prob = np.array(model.predict(white, verbose=0)[0], dtype='float32')
-    ch1 = np.argmax(prob, axis=0)
-    confidence = float(prob[ch1])  # Store original confidence before modifying
-    prob[ch1] = 0
-    ch2 = np.argmax(prob, axis=0)
-    prob[ch2] = 0
-    ch3 = np.argmax(prob, axis=0)
-    prob[ch3] = 0
-    
-    pl = [ch1, ch2]
-    
-    # All the complex conditions from final_pred.py
-    # condition for [Aemnst]
-    l = [[5, 2], [5, 3], [3, 5], [3, 6], [3, 0], [3, 2], [6, 4], [6, 1], [6, 2], [6, 6], [6, 7], [6, 0], [6, 5],
-         [4, 1], [1, 0], [1, 1], [6, 3], [1, 6], [5, 6], [5, 1], [4, 5], [1, 4], [1, 5], [2, 0], [2, 6], [4, 6],
-         [1, 0], [5, 7], [1, 6], [6, 1], [7, 6], [2, 5], [7, 1], [5, 4], [7, 0], [7, 5], [7, 2]]
-    if pl in l:
-        if (pts[6][1] < pts[8][1] and pts[10][1] < pts[12][1] and pts[14][1] < pts[16][1] and pts[18][1] < pts[20][1]):
-            ch1 = 0
-
-    # condition for [o][s]
-    l = [[2, 2], [2, 1]]
-    if pl in l:
-        if (pts[5][0] < pts[4][0]):
-            ch1 = 0
-
-    # condition for [c0][aemnst]
-    l = [[0, 0], [0, 6], [0, 2], [0, 5], [0, 1], [0, 7], [5, 2], [7, 6], [7, 1]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if (pts[0][0] > pts[8][0] and pts[0][0] > pts[4][0] and pts[0][0] > pts[12][0] and pts[0][0] > pts[16][0] and pts[0][0] > pts[20][0]) and pts[5][0] > pts[4][0]:
-            ch1 = 2
-
-    # condition for [c0][aemnst]
-    l = [[6, 0], [6, 6], [6, 2]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if distance(pts[8], pts[16]) < 52:
-            ch1 = 2
-
-    # condition for [gh][bdfikruvw]
-    l = [[1, 4], [1, 5], [1, 6], [1, 3], [1, 0]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if pts[6][1] > pts[8][1] and pts[14][1] < pts[16][1] and pts[18][1] < pts[20][1] and pts[0][0] < pts[8][0] and pts[0][0] < pts[12][0] and pts[0][0] < pts[16][0] and pts[0][0] < pts[20][0]:
-            ch1 = 3
-
-    # con for [gh][l]
-    l = [[4, 6], [4, 1], [4, 5], [4, 3], [4, 7]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if pts[4][0] > pts[0][0]:
-            ch1 = 3
-
-    # con for [gh][pqz]
-    l = [[5, 3], [5, 0], [5, 7], [5, 4], [5, 2], [5, 1], [5, 5]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if pts[2][1] + 15 < pts[16][1]:
-            ch1 = 3
-
-    # con for [l][x]
-    l = [[6, 4], [6, 1], [6, 2]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if distance(pts[4], pts[11]) > 55:
-            ch1 = 4
-
-    # con for [l][d]
-    l = [[1, 4], [1, 6], [1, 1]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if (distance(pts[4], pts[11]) > 50) and (pts[6][1] > pts[8][1] and pts[10][1] < pts[12][1] and pts[14][1] < pts[16][1] and pts[18][1] < pts[20][1]):
-            ch1 = 4
-
-    # con for [l][gh]
-    l = [[3, 6], [3, 4]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if (pts[4][0] < pts[0][0]):
-            ch1 = 4
-
-    # con for [l][c0]
-    l = [[2, 2], [2, 5], [2, 4]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if (pts[1][0] < pts[12][0]):
-            ch1 = 4
-
-    # con for [gh][z]
-    l = [[3, 6], [3, 5], [3, 4]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if (pts[6][1] > pts[8][1] and pts[10][1] < pts[12][1] and pts[14][1] < pts[16][1] and pts[18][1] < pts[20][1]) and pts[4][1] > pts[10][1]:
-            ch1 = 5
-
-    # con for [gh][pq]
-    l = [[3, 2], [3, 1], [3, 6]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if pts[4][1] + 17 > pts[8][1] and pts[4][1] + 17 > pts[12][1] and pts[4][1] + 17 > pts[16][1] and pts[4][1] + 17 > pts[20][1]:
-            ch1 = 5
-
-    # con for [l][pqz]
-    l = [[4, 4], [4, 5], [4, 2], [7, 5], [7, 6], [7, 0]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if pts[4][0] > pts[0][0]:
-            ch1 = 5
-
-    # con for [pqz][aemnst]
-    l = [[0, 2], [0, 6], [0, 1], [0, 5], [0, 0], [0, 7], [0, 4], [0, 3], [2, 7]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if pts[0][0] < pts[8][0] and pts[0][0] < pts[12][0] and pts[0][0] < pts[16][0] and pts[0][0] < pts[20][0]:
-            ch1 = 5
-
-    # con for [pqz][yj]
-    l = [[5, 7], [5, 2], [5, 6]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if pts[3][0] < pts[0][0]:
-            ch1 = 7
-
-    # con for [l][yj]
-    l = [[4, 6], [4, 2], [4, 4], [4, 1], [4, 5], [4, 7]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if pts[6][1] < pts[8][1]:
-            ch1 = 7
-
-    # con for [x][yj]
-    l = [[6, 7], [0, 7], [0, 1], [0, 0], [6, 4], [6, 6], [6, 5], [6, 1]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if pts[18][1] > pts[20][1]:
-            ch1 = 7
-
-    # condition for [x][aemnst]
-    l = [[0, 4], [0, 2], [0, 3], [0, 1], [0, 6]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if pts[5][0] > pts[16][0]:
-            ch1 = 6
-
-    # condition for [yj][x]
-    l = [[7, 2]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if pts[18][1] < pts[20][1] and pts[8][1] < pts[10][1]:
-            ch1 = 6
-
-    # condition for [c0][x]
-    l = [[2, 1], [2, 2], [2, 6], [2, 7], [2, 0]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if distance(pts[8], pts[16]) > 50:
-            ch1 = 6
-
-    # con for [l][x]
-    l = [[4, 6], [4, 2], [4, 1], [4, 4]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if distance(pts[4], pts[11]) < 60:
-            ch1 = 6
-
-    # con for [x][d]
-    l = [[1, 4], [1, 6], [1, 0], [1, 2]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if pts[5][0] - pts[4][0] - 15 > 0:
-            ch1 = 6
-
-    # con for [b][pqz]
-    l = [[5, 0], [5, 1], [5, 4], [5, 5], [5, 6], [6, 1], [7, 6], [0, 2], [7, 1], [7, 4], [6, 6], [7, 2], [5, 0],
-         [6, 3], [6, 4], [7, 5], [7, 2]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if (pts[6][1] > pts[8][1] and pts[10][1] > pts[12][1] and pts[14][1] > pts[16][1] and pts[18][1] > pts[20][1]):
-            ch1 = 1
-
-    # con for [f][pqz]
-    l = [[6, 1], [6, 0], [0, 3], [6, 4], [2, 2], [0, 6], [6, 2], [7, 6], [4, 6], [4, 1], [4, 2], [0, 2], [7, 1],
-         [7, 4], [6, 6], [7, 2], [7, 5], [7, 2]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if (pts[6][1] < pts[8][1] and pts[10][1] > pts[12][1] and pts[14][1] > pts[16][1] and pts[18][1] > pts[20][1]):
-            ch1 = 1
-
-    l = [[6, 1], [6, 0], [4, 2], [4, 1], [4, 6], [4, 4]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if (pts[10][1] > pts[12][1] and pts[14][1] > pts[16][1] and pts[18][1] > pts[20][1]):
-            ch1 = 1
-
-    # con for [d][pqz]
-    l = [[5, 0], [3, 4], [3, 0], [3, 1], [3, 5], [5, 5], [5, 4], [5, 1], [7, 6]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if ((pts[6][1] > pts[8][1] and pts[10][1] < pts[12][1] and pts[14][1] < pts[16][1] and pts[18][1] < pts[20][1]) and (pts[2][0] < pts[0][0]) and pts[4][1] > pts[14][1]):
-            ch1 = 1
-
-    l = [[4, 1], [4, 2], [4, 4]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if (distance(pts[4], pts[11]) < 50) and (pts[6][1] > pts[8][1] and pts[10][1] < pts[12][1] and pts[14][1] < pts[16][1] and pts[18][1] < pts[20][1]):
-            ch1 = 1
-
-    l = [[3, 4], [3, 0], [3, 1], [3, 5], [3, 6]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if ((pts[6][1] > pts[8][1] and pts[10][1] < pts[12][1] and pts[14][1] < pts[16][1] and pts[18][1] < pts[20][1]) and (pts[2][0] < pts[0][0]) and pts[14][1] < pts[4][1]):
-            ch1 = 1
-
-    l = [[6, 6], [6, 4], [6, 1], [6, 2]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if pts[5][0] - pts[4][0] - 15 < 0:
-            ch1 = 1
-
-    # con for [i][pqz]
-    l = [[5, 4], [5, 5], [5, 1], [0, 3], [0, 7], [5, 0], [0, 2], [6, 2], [7, 5], [7, 1], [7, 6], [7, 7]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if ((pts[6][1] < pts[8][1] and pts[10][1] < pts[12][1] and pts[14][1] < pts[16][1] and pts[18][1] > pts[20][1])):
-            ch1 = 1
-
-    # con for [yj][bfdi]
-    l = [[1, 5], [1, 7], [1, 1], [1, 6], [1, 3], [1, 0]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if (pts[4][0] < pts[5][0] + 15) and ((pts[6][1] < pts[8][1] and pts[10][1] < pts[12][1] and pts[14][1] < pts[16][1] and pts[18][1] > pts[20][1])):
-            ch1 = 7
-
-    # con for [uvr]
-    l = [[5, 5], [5, 0], [5, 4], [5, 1], [4, 6], [4, 1], [7, 6], [3, 0], [3, 5]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if ((pts[6][1] > pts[8][1] and pts[10][1] > pts[12][1] and pts[14][1] < pts[16][1] and pts[18][1] < pts[20][1])) and pts[4][1] > pts[14][1]:
-            ch1 = 1
-
-    # con for [w]
-    fg = 13
-    l = [[3, 5], [3, 0], [3, 6], [5, 1], [4, 1], [2, 0], [5, 0], [5, 5]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if not (pts[0][0] + fg < pts[8][0] and pts[0][0] + fg < pts[12][0] and pts[0][0] + fg < pts[16][0] and pts[0][0] + fg < pts[20][0]) and not (pts[0][0] > pts[8][0] and pts[0][0] > pts[12][0] and pts[0][0] > pts[16][0] and pts[0][0] > pts[20][0]) and distance(pts[4], pts[11]) < 50:
-            ch1 = 1
-
-    # con for [w]
-    l = [[5, 0], [5, 5], [0, 1]]
-    pl = [ch1, ch2]
-    if pl in l:
-        if pts[6][1] > pts[8][1] and pts[10][1] > pts[12][1] and pts[14][1] > pts[16][1]:
-            ch1 = 1
-
-    # Convert group numbers to letters
-    if ch1 == 0:
-        ch1 = 'S'
-        if pts[4][0] < pts[6][0] and pts[4][0] < pts[10][0] and pts[4][0] < pts[14][0] and pts[4][0] < pts[18][0]:
-            ch1 = 'A'
-        if pts[4][0] > pts[6][0] and pts[4][0] < pts[10][0] and pts[4][0] < pts[14][0] and pts[4][0] < pts[18][0] and pts[4][1] < pts[14][1] and pts[4][1] < pts[18][1]:
-            ch1 = 'T'
-        if pts[4][1] > pts[8][1] and pts[4][1] > pts[12][1] and pts[4][1] > pts[16][1] and pts[4][1] > pts[20][1]:
-            ch1 = 'E'
-        if pts[4][0] > pts[6][0] and pts[4][0] > pts[10][0] and pts[4][0] > pts[14][0] and pts[4][1] < pts[18][1]:
-            ch1 = 'M'
-        if pts[4][0] > pts[6][0] and pts[4][0] > pts[10][0] and pts[4][1] < pts[18][1] and pts[4][1] < pts[14][1]:
-            ch1 = 'N'
-
-    if ch1 == 2:
-        if distance(pts[12], pts[4]) > 42:
-            ch1 = 'C'
-        else:
-            ch1 = 'O'
-
-    if ch1 == 3:
-        if (distance(pts[8], pts[12])) > 72:
-            ch1 = 'G'
-        else:
-            ch1 = 'H'
-
-    if ch1 == 7:
-        if distance(pts[8], pts[4]) > 42:
-            ch1 = 'Y'
-        else:
-            ch1 = 'J'
-
-    if ch1 == 4:
-        ch1 = 'L'
+    if INFERENCE_ENGINE == 'template':
+        # Letters straight from the nearest templates, no group rules; the
+        # gestures the web app relies on (space, confirm, backspace) still apply
+        with stage('model_predict'):
+            letter, confidence = template_matcher.classify(pts)
+        with stage('rules'):
+            return str(rule_engine.apply_gestures([letter], [pts])[0]), confidence
+    if INFERENCE_ENGINE == 'landmark':
+        # Microseconds of NumPy per hand, nothing to gain from batching
+        with stage('model_predict'):
+            prob = landmark_classifier.predict([pts])[0]
+    else:
+        prob, key = lookup_prediction(owner, pts, size)
+        if prob is None:
+            if white_canvas is None:
+                with stage('draw_skeleton'):
+                    white_canvas = render_skeleton(pts, *size)
+            # Get model prediction, batched with concurrent requests
+            with stage('model_wait'):
+                prob = scheduler.submit(white_canvas)
+            store_prediction(owner, key, prob)
+    return apply_sign_rules(prob, pts)
+
+def apply_sign_rules(prob, pts):
+    """
+    Turn the CNN group probabilities into a letter using the hand landmarks
+    (same rules as final_pred.py, see sign_rules.py)
+    Returns: (letter, confidence)
+    """
+    with stage('rules'):
+        return rule_engine.classify(prob, pts)
 
-    if ch1 == 6:
-        ch1 = 'X'
+def encode_canvas(white_canvas):
+    """JPEG data URL of a canvas for debug views"""
+    with stage('jpeg_encode'):
+        _, buffer = cv2.imencode('.jpg', white_canvas)
+        return f'data:image/jpeg;base64,{base64.b64encode(buffer).decode("utf-8")}'
 
-    if ch1 == 5:
-        if pts[4][0] > pts[12][0] and pts[4][0] > pts[16][0] and pts[4][0] > pts[20][0]:
-            if pts[8][1] < pts[5][1]:
-                ch1 = 'Z'
-            else:
-                ch1 = 'Q'
-        else:
-            ch1 = 'P'
-
-    if ch1 == 1:
-        if (pts[6][1] > pts[8][1] and pts[10][1] > pts[12][1] and pts[14][1] > pts[16][1] and pts[18][1] > pts[20][1]):
-            ch1 = 'B'
-        if (pts[6][1] > pts[8][1] and pts[10][1] < pts[12][1] and pts[14][1] < pts[16][1] and pts[18][1] < pts[20][1]):
-            ch1 = 'D'
-        if (pts[6][1] < pts[8][1] and pts[10][1] > pts[12][1] and pts[14][1] > pts[16][1] and pts[18][1] > pts[20][1]):
-            ch1 = 'F'
-        if (pts[6][1] < pts[8][1] and pts[10][1] < pts[12][1] and pts[14][1] < pts[16][1] and pts[18][1] > pts[20][1]):
-            ch1 = 'I'
-        if (pts[6][1] > pts[8][1] and pts[10][1] > pts[12][1] and pts[14][1] > pts[16][1] and pts[18][1] < pts[20][1]):
-            ch1 = 'W'
-        if (pts[6][1] > pts[8][1] and pts[10][1] > pts[12][1] and pts[14][1] < pts[16][1] and pts[18][1] < pts[20][1]) and pts[4][1] < pts[9][1]:
-            ch1 = 'K'
-        if ((distance(pts[8], pts[12]) - distance(pts[6], pts[10])) < 8) and (pts[6][1] > pts[8][1] and pts[10][1] > pts[12][1] and pts[14][1] < pts[16][1] and pts[18][1] < pts[20][1]):
-            ch1 = 'U'
-        if ((distance(pts[8], pts[12]) - distance(pts[6], pts[10])) >= 8) and (pts[6][1] > pts[8][1] and pts[10][1] > pts[12][1] and pts[14][1] < pts[16][1] and pts[18][1] < pts[20][1]) and (pts[4][1] > pts[9][1]):
-            ch1 = 'V'
-        if (pts[8][0] > pts[12][0]) and (pts[6][1] > pts[8][1] and pts[10][1] > pts[12][1] and pts[14][1] < pts[16][1] and pts[18][1] < pts[20][1]):
-            ch1 = 'R'
-
-    # Space detection
-    if ch1 == 1 or ch1 == 'E' or ch1 == 'S' or ch1 == 'X' or ch1 == 'Y' or ch1 == 'B':
-        if (pts[6][1] > pts[8][1] and pts[10][1] < pts[12][1] and pts[14][1] < pts[16][1] and pts[18][1] > pts[20][1]):
-            ch1 = " "
-
-    # "Confirm" gesture detection - Open Palm (all fingers extended upward)
-    # This gesture confirms/accepts the current letter (allows duplicates)
-    # Palm gesture: All fingers extended and pointing up, palm facing camera
-    # Check: All fingertips are above their base joints, and thumb is extended
-    if (pts[4][1] < pts[3][1] and  # Thumb tip above thumb base
-        pts[8][1] < pts[6][1] and  # Index finger tip above base
-        pts[12][1] < pts[10][1] and  # Middle finger tip above base
-        pts[16][1] < pts[14][1] and  # Ring finger tip above base
-        pts[20][1] < pts[18][1] and  # Pinky tip above base
-        pts[0][1] < pts[5][1] and  # Wrist above index base (palm facing up/forward)
-        pts[0][1] < pts[9][1] and  # Wrist above middle base
-        pts[0][1] < pts[13][1]):  # Wrist above ring base
-        ch1 = "confirm"
-
-    # Backspace gesture detection
-    if ch1 == 'B' or ch1 == 'C' or ch1 == 'H' or ch1 == 'F' or ch1 == 'X':
-        if (pts[0][0] > pts[8][0] and pts[0][0] > pts[12][0] and pts[0][0] > pts[16][0] and pts[0][0] > pts[20][0]) and \
-           (pts[4][1] < pts[8][1] and pts[4][1] < pts[12][1] and pts[4][1] < pts[16][1] and pts[4][1] < pts[20][1]) and \
-           (pts[4][1] < pts[6][1] and pts[4][1] < pts[10][1] and pts[4][1] < pts[14][1] and pts[4][1] < pts[18][1]):
-            ch1 = 'Backspace'
-
-    return str(ch1), confidence
-
-def draw_hand_skeleton(frame):
+def parse_landmarks(data):
+    """
+    Read {"landmarks": 21 [x, y] points, "width": w, "height": h} from a client
+    that tracks hands itself
+    Returns: (pts, w, h, error) - pts as integer [x, y] lists like hd2's lmList
+    """
+    if not data or 'landmarks' not in data:
+        return None, 0, 0, 'no landmarks provided'
+    try:
+        pts = np.asarray(data['landmarks'], dtype=np.float64)
+        w, h = int(data.get('width', 0)), int(data.get('height', 0))
+    except (TypeError, ValueError):
+        return None, 0, 0, 'landmarks must be 21 [x, y] points, width and height numbers'
+    if pts.size not in (42, 63) or not np.isfinite(pts).all():
+        return None, 0, 0, 'landmarks must be 21 [x, y] (or [x, y, z]) points'
+    if w <= 0 or h <= 0:
+        return None, 0, 0, 'width and height of the hand bbox are required'
+    pts = pts.reshape(21, -1)[:, :2]
+    return np.rint(pts).astype(int).tolist(), w, h, None
+
+def query_flag(name):
+    """True when the query string sets name to 1/true/yes"""
+    return request.args.get(name, '0').lower() in ('1', 'true', 'yes')
+
+def debug_requested():
+    """True when the client asked for the debug canvas (?debug=1 or JSON "debug": true)"""
+    if query_flag('debug'):
+        return True
+    data = request.get_json(silent=True) if request.is_json else None
+    return bool(data and data.get('debug'))
+
+def current_session():
+    """Session for the X-Session-Id header of the current request, or None"""
+    session_id = request.headers.get(SESSION_HEADER)
+    return sessions.get(session_id) if session_id else None
+
+def static_result(frame, session):
+    """
+    Check a session frame against the last analysed one
+    Returns: (result or None, thumbnail) - result is the previous answer when the
+    scene is unchanged; thumbnail is None when the check does not apply
+    """
+    if session is None or STATIC_FRAME_MAX_AGE <= 0:
+        return None, None
+    with stage('frame_diff'):
+        thumbnail = frame.thumbnail()
+        result = session.static_result(thumbnail, STATIC_FRAME_THRESHOLD, STATIC_FRAME_MAX_AGE)
+    if result is not None:
+        STATIC_FRAMES.inc()
+    return result, thumbnail
+
+def draw_hand_skeleton(frame, session=None, render=True):
     """
     Draw hand skeleton on white canvas and return landmarks
-    Returns: (white_canvas, landmarks_list)
+    Returns: (white_canvas, landmarks_list, (w, h) bbox size or None)
     Matches the exact logic from final_pred.py
+    With a session, its own tracking detectors are used instead of the pool
+    With render=False only the landmarks are found and white_canvas is None
     """
-    white = np.ones((400, 400, 3), np.uint8) * 255
+    white = None
     pts = None
+    size = None
     
     try:
-        # Flip frame horizontally (same as final_pred.py)
-        frame = cv2.flip(frame, 1)
-        
-        # Find hands (cvzone returns tuple or list)
-        hands_result = hd.findHands(frame, draw=False, flipType=True)
-        
-        # Handle different return types from cvzone
-        if isinstance(hands_result, tuple):
-            hands = hands_result[0] if hands_result[0] else []
+        if session is not None:
+            with session.lock:
+                pts, w, h = find_hand_landmarks(frame, session.hd, session.hd2, mode=LANDMARK_MODE, timer=stage)
+                session.update(pts, w, h)
         else:
-            hands = hands_result if hands_result else []
+            # Hold a detector pair only for the MediaPipe passes
+            with detectors.checkout() as (hd, hd2):
+                pts, w, h = find_hand_landmarks(frame, hd, hd2, mode=LANDMARK_MODE, timer=stage)
         
-        if hands and len(hands) > 0:
-            # Structure exactly like final_pred.py: hands[0] is a list, hands[0][0] is the map
-            hand = hands[0]
-            if isinstance(hand, list) and len(hand) > 0:
-                hand_map = hand[0]
-                x, y, w, h = hand_map['bbox']
-            elif isinstance(hand, dict) and 'bbox' in hand:
-                # Direct dict structure
-                x, y, w, h = hand['bbox']
-            else:
-                # Try as direct dict
-                hand_map = hand if isinstance(hand, dict) else hand[0] if isinstance(hand, list) else {}
-                x, y, w, h = hand_map.get('bbox', (0, 0, 0, 0))
-            
-            # Extract hand region with offset
-            y_start = max(0, y - offset)
-            y_end = min(frame.shape[0], y + h + offset)
-            x_start = max(0, x - offset)
-            x_end = min(frame.shape[1], x + w + offset)
-            
-            if y_end > y_start and x_end > x_start:
-                image = frame[y_start:y_end, x_start:x_end]
-                
-                if image.size > 0 and len(image.shape) == 3:
-                    # Second hand detection on cropped image
-                    handz_result = hd2.findHands(image, draw=False, flipType=True)
-                    
-                    # Handle different return types
-                    if isinstance(handz_result, tuple):
-                        handz = handz_result[0] if handz_result[0] else []
-                    else:
-                        handz = handz_result if handz_result else []
-                    
-                    if handz and len(handz) > 0:
-                        # Structure exactly like final_pred.py: handz[0] is a list, handz[0][0] is the map
-                        hand = handz[0]
-                        if isinstance(hand, list) and len(hand) > 0:
-                            hand_map = hand[0]
-                            pts = hand_map['lmList']
-                        elif isinstance(hand, dict) and 'lmList' in hand:
-                            # Direct dict structure
-                            pts = hand['lmList']
-                        else:
-                            # Try as direct dict
-                            hand_map = hand if isinstance(hand, dict) else hand[0] if isinstance(hand, list) else {}
-                            pts = hand_map.get('lmList', None)
-                        
-                        if pts and len(pts) >= 21:
-                            os = ((400 - w) // 2) - 15
-                            os1 = ((400 - h) // 2) - 15
-                            
-                            # Draw finger lines
-                            for t in range(0, 4, 1):
-                                cv2.line(white, (pts[t][0] + os, pts[t][1] + os1), 
-                                        (pts[t + 1][0] + os, pts[t + 1][1] + os1), (0, 255, 0), 3)
-                            for t in range(5, 8, 1):
-                                cv2.line(white, (pts[t][0] + os, pts[t][1] + os1), 
-                                        (pts[t + 1][0] + os, pts[t + 1][1] + os1), (0, 255, 0), 3)
-                            for t in range(9, 12, 1):
-                                cv2.line(white, (pts[t][0] + os, pts[t][1] + os1), 
-                                        (pts[t + 1][0] + os, pts[t + 1][1] + os1), (0, 255, 0), 3)
-                            for t in range(13, 16, 1):
-                                cv2.line(white, (pts[t][0] + os, pts[t][1] + os1), 
-                                        (pts[t + 1][0] + os, pts[t + 1][1] + os1), (0, 255, 0), 3)
-                            for t in range(17, 20, 1):
-                                cv2.line(white, (pts[t][0] + os, pts[t][1] + os1), 
-                                        (pts[t + 1][0] + os, pts[t + 1][1] + os1), (0, 255, 0), 3)
-                            
-                            # Draw palm lines
-                            cv2.line(white, (pts[5][0] + os, pts[5][1] + os1), 
-                                    (pts[9][0] + os, pts[9][1] + os1), (0, 255, 0), 3)
-                            cv2.line(white, (pts[9][0] + os, pts[9][1] + os1), 
-                                    (pts[13][0] + os, pts[13][1] + os1), (0, 255, 0), 3)
-                            cv2.line(white, (pts[13][0] + os, pts[13][1] + os1), 
-                                    (pts[17][0] + os, pts[17][1] + os1), (0, 255, 0), 3)
-                            cv2.line(white, (pts[0][0] + os, pts[0][1] + os1), 
-                                    (pts[5][0] + os, pts[5][1] + os1), (0, 255, 0), 3)
-                            cv2.line(white, (pts[0][0] + os, pts[0][1] + os1), 
-                                    (pts[17][0] + os, pts[17][1] + os1), (0, 255, 0), 3)
-                            
-                            # Draw joints
-                            for i in range(21):
-                                cv2.circle(white, (pts[i][0] + os, pts[i][1] + os1), 2, (0, 0, 255), 1)
+        FRAMES.inc(hand='detected' if pts and len(pts) >= 21 else 'none')
+        if pts and len(pts) >= 21:
+            size = (w, h)
+        if render and size is not None:
+            with stage('draw_skeleton'):
+                white = render_skeleton(pts, w, h)
     except Exception as e:
         print(f"Error drawing skeleton: {e}")
         import traceback
         traceback.print_exc()
     
-    return white, pts
+    if white is None and render:
+        white = np.ones((400, 400, 3), np.uint8) * 255
+    return white, pts, size
+
+@app.before_request
+def track_request_start():
+    request.started = time.perf_counter()
+    IN_FLIGHT.inc(endpoint=request.endpoint or 'unknown')
+
+@app.teardown_request
+def track_request_end(error=None):
+    endpoint = request.endpoint or 'unknown'
+    IN_FLIGHT.dec(endpoint=endpoint)
+    REQUEST_SECONDS.observe(time.perf_counter() - request.started, endpoint=endpoint)
 
 @app.route('/predict', methods=['POST'])
 def predict():
     try:
-        if model is None:
-            return jsonify({
-                'error': 'Model not loaded',
-                'message': 'Please ensure cnn8grps_rad1_model.h5 exists in the root directory'
-            }), 503
+        if not engine_ready():
+            return not_ready_response()
         
-        data = request.json
-        if 'image' not in data:
-            return jsonify({'error': 'no image provided'}), 400
+        frame, error = read_request_frame()
+        if error:
+            return jsonify({'error': error}), 400
         
-        img_data = base64.b64decode(data['image'].split(',')[1])
-        img = Image.open(io.BytesIO(img_data)).convert('RGB')
-        frame = cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
-        
-        # Debug: Check frame dimensions
-        if frame is None or frame.size == 0:
+        if frame is None:
             return jsonify({'error': 'Invalid frame received'}), 400
         
-        # Get hand skeleton and landmarks (same as final_pred.py)
-        white_canvas, pts = draw_hand_skeleton(frame)
+        # The canvas is drawn here for the debug view, otherwise only on a prediction cache miss
+        debug = debug_requested()
+        session = current_session()
+        # A still scene gets the last answer without detection or the model (not in debug view)
+        thumbnail = None
+        if not debug:
+            result, thumbnail = static_result(frame, session)
+            if result is not None:
+                return jsonify(result)
+        white_canvas, pts, size = draw_hand_skeleton(frame, session, render=debug)
+        analysed = True
         
         # Use advanced prediction with white canvas and landmarks
         if pts is not None and len(pts) >= 21:
             try:
-                predicted, confidence = predict_sign_advanced(white_canvas, pts)
+                predicted, confidence = predict_sign_advanced(white_canvas, pts, size, cache_owner(session))
+            except SchedulerBusy:
+                raise
             except Exception as pred_error:
                 print(f"Prediction error: {pred_error}")
                 import traceback
                 traceback.print_exc()
                 predicted = '—'
                 confidence = 0.0
+                analysed = False
         else:
             predicted = '—'
             confidence = 0.0
@@ -560,18 +574,17 @@ def predict():
             elif len(pts) < 21:
                 print(f"Not enough landmarks - got {len(pts) if pts else 0} points")
         
-        # Encode white canvas to base64
-        _, buffer = cv2.imencode('.jpg', white_canvas)
-        white_canvas_b64 = base64.b64encode(buffer).decode('utf-8')
-        
-        return jsonify({
+        result = {
             'text': predicted,
             'confidence': confidence,
-            'white_canvas': f'data:image/jpeg;base64,{white_canvas_b64}',
-            'skeleton': f'data:image/jpeg;base64,{white_canvas_b64}',
             'hand_detected': pts is not None and len(pts) >= 21
-        })
-    except ValueError as e:
+        }
+        if thumbnail is not None and analysed:
+            session.remember(thumbnail, result)
+        if debug:
+            result['white_canvas'] = encode_canvas(white_canvas)
+        return jsonify(result)
+    except (ValueError, SchedulerBusy) as e:
         return jsonify({'error': str(e)}), 503
     except Exception as e:
         print(f"Prediction error: {e}")
@@ -581,64 +594,369 @@ def predict():
 
 @app.route('/detect', methods=['POST'])
 def detect():
-    if model is None:
-        return jsonify({
-            'error': 'Model not loaded',
-            'message': 'Please ensure cnn8grps_rad1_model.h5 exists in the root directory'
-        }), 503
+    if not engine_ready():
+        return not_ready_response()
     
-    data = request.json
-    if 'image' not in data:
-        return jsonify({'error': 'no image provided'}), 400
-
     try:
-        img_data = base64.b64decode(data['image'].split(',')[1])
-        img = Image.open(io.BytesIO(img_data)).convert('RGB')
-        frame = cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
+        frame, error = read_request_frame()
+        if error:
+            return jsonify({'error': error}), 400
+
+        session = current_session()
+        result, thumbnail = static_result(frame, session)
+        if result is not None:
+            return jsonify({'text': result['text'], 'confidence': result['confidence']})
 
         # Get hand skeleton and landmarks
-        white_canvas, pts = draw_hand_skeleton(frame)
+        white_canvas, pts, size = draw_hand_skeleton(frame, session, render=False)
         
         # Use advanced prediction
         if pts is not None and len(pts) >= 21:
-            predicted, confidence = predict_sign_advanced(white_canvas, pts)
+            predicted, confidence = predict_sign_advanced(white_canvas, pts, size, cache_owner(session))
         else:
             predicted = '—'
             confidence = 0.0
-            
+
+        if thumbnail is not None:
+            session.remember(thumbnail, {'text': predicted, 'confidence': confidence,
+                                         'hand_detected': pts is not None and len(pts) >= 21})
         return jsonify({'text': predicted, 'confidence': confidence})
+    except SchedulerBusy as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/predict_landmarks', methods=['POST'])
+def predict_landmarks():
+    """
+    Predict from landmarks found on the client, skipping upload, decode and both HandDetector passes
+    Request: {"landmarks": [[x, y], ... 21 points], "width": w, "height": h}
+             in the coordinates of hd2's lmList (hand crop of the mirrored frame)
+    Response: {"text", "confidence", "hand_detected"[, "white_canvas" with ?debug=1]}
+    """
+    if not engine_ready():
+        return not_ready_response()
+
+    pts, w, h, error = parse_landmarks(request.get_json(silent=True))
+    if error:
+        return jsonify({'error': error}), 400
+
+    try:
+        debug = debug_requested()
+        white_canvas = None
+        if debug:
+            with stage('draw_skeleton'):
+                white_canvas = render_skeleton(pts, w, h)
+        # The header only names the cache entries here: a tracking session would
+        # build MediaPipe detectors this endpoint never uses
+        owner = request.headers.get(SESSION_HEADER) or None
+        predicted, confidence = predict_sign_advanced(white_canvas, pts, (w, h), owner)
+
+        result = {'text': predicted, 'confidence': confidence, 'hand_detected': True}
+        if debug:
+            result['white_canvas'] = encode_canvas(white_canvas)
+        return jsonify(result)
+    except (ValueError, SchedulerBusy) as e:
+        return jsonify({'error': str(e)}), 503
+    except Exception as e:
+        print(f"Landmark prediction error: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+def stream(ws):
+    """
+    Continuous recognition over one long-lived WebSocket
+    Client sends binary JPEG/PNG frames; a text message {"skeleton": true/false}
+    switches the debug canvas on or off (also ?skeleton=1 on connect)
+    Server answers each frame with {"text", "confidence", "hand_detected"[, "skeleton"]}
+    Each connection tracks the hand with its own session detectors
+    """
+    send_skeleton = query_flag('skeleton')
+    session_id = f'ws-{uuid.uuid4().hex}'
+    try:
+        stream_frames(ws, sessions.get(session_id), send_skeleton)
+    finally:
+        sessions.close(session_id)
+        prediction_cache.close(session_id)
+
+def stream_frames(ws, session, send_skeleton):
+    """Answer frames on ws until the client disconnects"""
+    while True:
+        message = ws.receive()
+        if message is None:
+            break
+        if isinstance(message, str):
+            try:
+                send_skeleton = bool(json.loads(message).get('skeleton', send_skeleton))
+            except (ValueError, AttributeError):
+                ws.send(json.dumps({'error': 'expected a binary frame or {"skeleton": bool}'}))
+            continue
+
+        if not engine_ready():
+            ws.send(json.dumps({'error': 'Model loading' if startup['state'] == 'starting' else 'Model not loaded'}))
+            continue
+
+        frame = decode_image_bytes(message, session)
+        if frame is None:
+            ws.send(json.dumps({'error': 'Invalid frame received'}))
+            continue
+
+        thumbnail = None
+        if not send_skeleton:
+            result, thumbnail = static_result(frame, session)
+            if result is not None:
+                ws.send(json.dumps(result))
+                continue
+
+        try:
+            white_canvas, pts, size = draw_hand_skeleton(frame, session, render=send_skeleton)
+            hand_detected = pts is not None and len(pts) >= 21
+            if hand_detected:
+                predicted, confidence = predict_sign_advanced(white_canvas, pts, size, cache_owner(session))
+            else:
+                predicted, confidence = '—', 0.0
+        except Exception as e:
+            print(f"Stream prediction error: {e}")
+            ws.send(json.dumps({'error': str(e)}))
+            continue
+
+        result = {'text': predicted, 'confidence': confidence, 'hand_detected': hand_detected}
+        if thumbnail is not None:
+            session.remember(thumbnail, result)
+        if send_skeleton:
+            result['skeleton'] = encode_canvas(white_canvas)
+        ws.send(json.dumps(result))
+
+if sock is not None:
+    sock.route('/stream')(stream)
+else:
+    print("flask-sock not installed: WebSocket /stream endpoint disabled (pip install flask-sock)")
+
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    """
+    Predict many frames with a single model call
+    Request: {"images": ["data:image/jpeg;base64,...", ...]}
+             or a multipart upload with one 'images' file per frame
+    Response: {"results": [{"text", "confidence", "hand_detected"}, ...]} in request order
+    """
+    if not engine_ready():
+        return not_ready_response()
+
+    if request.mimetype == 'multipart/form-data':
+        images = [f.read() for f in request.files.getlist('images')]
+        decode = decode_image_bytes
+    else:
+        data = request.get_json(silent=True)
+        images = data.get('images') if data else None
+        decode = decode_image
+    if not isinstance(images, list) or not images:
+        return jsonify({'error': 'no images provided'}), 400
+    if len(images) > MAX_BATCH_FRAMES:
+        return jsonify({'error': f'too many images, at most {MAX_BATCH_FRAMES} per request'}), 413
+
+    try:
+        # Frames of one replay are consecutive, so a session can track across them
+        session = current_session()
+        results = []
+        detected = []  # (result index, pts, bbox size) for frames that reach the model
+        for image in images:
+            try:
+                frame = decode(image, session)
+                if frame is None:
+                    raise ValueError('could not decode image')
+            except Exception as e:
+                results.append({'error': f'invalid image: {e}', 'text': '—', 'confidence': 0.0, 'hand_detected': False})
+                continue
+
+            _, pts, size = draw_hand_skeleton(frame, session, render=False)
+            hand_detected = pts is not None and len(pts) >= 21
+            results.append({'text': '—', 'confidence': 0.0, 'hand_detected': hand_detected})
+            if hand_detected:
+                detected.append((len(results) - 1, pts, size))
+
+        if detected:
+            pts_list = [pts for _, pts, _ in detected]
+            if INFERENCE_ENGINE == 'template':
+                letters, confidences = template_matcher.predict(pts_list)
+                with stage('rules'):
+                    letters = rule_engine.apply_gestures(letters, pts_list)
+            else:
+                probs = predict_groups(pts_list, [size for _, _, size in detected], cache_owner(session))
+                with stage('rules'):
+                    letters, confidences = rule_engine.classify_batch(probs, pts_list)
+            for (i, _, _), letter, confidence in zip(detected, letters, confidences):
+                results[i]['text'] = str(letter)
+                results[i]['confidence'] = float(confidence)
+
+        return jsonify({'results': results})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 503
+    except Exception as e:
+        print(f"Batch prediction error: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/speak', methods=['POST'])
 def speak():
-    text = request.json.get('text', '')
-    if text:
-        tts.say(text)
-        tts.runAndWait()
-    return jsonify({'message': 'spoken'})
+    """
+    Queue text for the speech worker and return at once
+    Request: {"text": str, "replace": bool, "rate": int, "volume": float, "voice": str}
+    - replace drops utterances still waiting; the voice settings are optional
+    Response: 202 {"job_id", "state", "text", "error"}; the same text still waiting
+    is not queued twice, its job is returned instead
+    """
+    data = request.get_json(silent=True) or {}
+    text = str(data.get('text', '')).strip()
+    if not text:
+        return jsonify({'message': 'nothing to speak'})
+    try:
+        settings = voice_settings(data)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'invalid voice setting: {e}'}), 400
+    try:
+        job, queued = speech.submit(text, replace=bool(data.get('replace', False)), settings=settings)
+    except SpeechQueueFull as e:
+        TTS_JOBS.inc(result='rejected')
+        return jsonify({'error': str(e)}), 503
+    if not queued:
+        TTS_JOBS.inc(result='coalesced')
+    return jsonify(job.to_dict()), 202
+
+@app.route('/speak/<job_id>', methods=['GET'])
+def speak_status(job_id):
+    """State of a speech job: queued, speaking, done, failed or cancelled"""
+    job = speech.get(job_id)
+    if job is None:
+        return jsonify({'error': 'unknown job'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/speak/<job_id>', methods=['DELETE'])
+def speak_cancel(job_id):
+    """Cancel a speech job that has not started; 409 once it is speaking or finished"""
+    job = speech.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'unknown job'}), 404
+    if job.state != 'cancelled':
+        return jsonify(job.to_dict()), 409
+    return jsonify(job.to_dict())
+
+@app.route('/tts', methods=['GET', 'POST'])
+def tts():
+    """
+    Speech audio for the client to play itself
+    Request: GET /tts?text=...&rate=&volume=&voice= or POST {"text", "rate", "volume", "voice"}
+    Response: the audio file (WAV with the usual pyttsx3 drivers), X-Cache: hit|miss;
+    the same normalized text and settings are rendered once and then served from disk
+    """
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+    else:
+        data = request.args
+    # Spoken as sent (casing matters for acronyms), with the whitespace the cache key ignores collapsed
+    text = normalize_text(data.get('text', ''))
+    if not text:
+        return jsonify({'error': 'No text provided'}), 400
+    if len(text) > TTS_MAX_CHARS:
+        return jsonify({'error': f'text is longer than {TTS_MAX_CHARS} characters'}), 400
+    try:
+        settings = voice_settings(data)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'invalid voice setting: {e}'}), 400
+
+    key = audio_cache.key(text, settings)
+    if request.if_none_match.contains(key):
+        AUDIO_LOOKUPS.inc(result='not_modified')
+        return Response(status=304, headers={'ETag': f'"{key}"'})
+    try:
+        f, hit = audio_cache.get_or_render(key, lambda path: render_speech(text, settings, path),
+                                           timeout=TTS_RENDER_TIMEOUT)
+    except SpeechQueueFull as e:
+        AUDIO_LOOKUPS.inc(result='rejected')
+        return jsonify({'error': str(e)}), 503
+    except TimeoutError as e:
+        AUDIO_LOOKUPS.inc(result='timeout')
+        return jsonify({'error': str(e)}), 504
+    except Exception as e:
+        print(f"TTS render error: {e}")
+        AUDIO_LOOKUPS.inc(result='failed')
+        return jsonify({'error': str(e)}), 500
+    AUDIO_LOOKUPS.inc(result='hit' if hit else 'miss')
+
+    response = send_file(f, mimetype='audio/wav', etag=key, max_age=86400)
+    response.headers['X-Cache'] = 'hit' if hit else 'miss'
+    return response
 
 @app.route('/health', methods=['GET'])
 def health():
-    """Health check endpoint"""
+    """Health check endpoint: live as soon as the port is bound, ready once start_up() is done"""
     return jsonify({
         'status': 'running',
-        'model_loaded': model is not None,
+        'live': True,
+        'ready': startup['state'] == 'ready',
+        'startup': startup,
+        'model_loaded': engine_ready(),
+        'inference_engine': INFERENCE_ENGINE,
+        'model_backend': model.name if model is not None else None,
         'model_file': MODEL_FILE,
         'model_exists': os.path.exists(MODEL_FILE)
     })
 
+@app.route('/health/live', methods=['GET'])
+def health_live():
+    """Liveness: the process is up and answering"""
+    return jsonify({'live': True})
+
+@app.route('/health/ready', methods=['GET'])
+def health_ready():
+    """Readiness: 200 once the model is loaded and warmed up, 503 until then (or if loading failed)"""
+    ready = startup['state'] == 'ready'
+    return jsonify({'ready': ready, 'state': startup['state'], 'error': startup['error']}), 200 if ready else 503
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics: stage timings, frames with/without a hand, requests in flight"""
+    BATCH_QUEUE.set(scheduler.stats()['queue_depth'])
+    TTS_QUEUE.set(speech.stats()['queue_depth'])
+    CACHE_ENTRIES.set(prediction_cache.stats()['entries'])
+    AUDIO_BYTES.set(audio_cache.stats()['bytes'])
+    return Response(registry.render(), content_type=registry.CONTENT_TYPE)
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Inference scheduler, detector pool, session, prediction cache, speech queue and audio cache state"""
+    return jsonify({
+        'scheduler': scheduler.stats(),
+        'detectors': detectors.stats(),
+        'sessions': sessions.stats(),
+        'prediction_cache': prediction_cache.stats(),
+        'speech': speech.stats(),
+        'audio_cache': audio_cache.stats(),
+        'landmark_mode': LANDMARK_MODE,
+        'detect_width': DETECT_WIDTH,
+        'inference_engine': INFERENCE_ENGINE
+    })
+
+if BACKGROUND_LOAD:
+    threading.Thread(target=start_up, name='startup', daemon=True).start()
+else:
+    start_up()
+
 if __name__ == '__main__':
     print("\n" + "="*60)
     print("SignSpeak Backend Server")
     print("="*60)
-    if model is None:
+    if startup['state'] == 'starting':
+        print(f"\n⏳ Loading {MODEL_FILE} in the background.")
+        print("   /health/ready answers 200 once predictions are possible.\n")
+    elif startup['state'] == 'failed':
         print("\n⚠️  WARNING: Model not loaded!")
-        print(f"   Model file '{MODEL_FILE}' not found.")
-        print("   The server will start but predictions will fail.")
-        print("   Please place the model file in the root directory.\n")
+        print(f"   {startup['error']}")
+        print("   The server will start but predictions will fail.\n")
     else:
         print("\n✅ Model loaded successfully!")
         print("   Server ready to accept requests.\n")
     print("="*60 + "\n")
-    app.run(host='0.0.0.0', port=5000)
+    app.run(host='0.0.0.0', port=PORT)
@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class Session:
+    """
+    Per-client state for one video stream.
+
+    Holds a dedicated pair of tracking-mode HandDetectors: MediaPipe keeps the
+    hand region from the previous frame and only refines landmarks inside it,
+    running full palm detection again when tracking confidence drops. The lock
+    keeps frames of one session in order, since a tracker must see them one at
+    a time.
+
+    It also remembers the last answer and a thumbnail of the frame it was
+    computed from, so a frame showing the same scene can get that answer back
+    without detection or the model (see static_result).
+    """
+
+    def __init__(self, session_id, hd, hd2):
+        self.id = session_id
+        self.hd = hd
+        self.hd2 = hd2
+        self.lock = threading.Lock()
+        self.last_seen = time.monotonic()
+
+        self.last_hand = None  # (w, h) of the last hand found, None when not tracking
+        self.frames = 0
+        self.tracked_frames = 0
+        self.lost = 0
+
+        self.reference = None  # thumbnail of the frame self.result was computed from
+        self.result = None
+        self.result_at = 0.0
+        self.static_frames = 0
+
+    def update(self, pts, w, h):
+        """Record the outcome of one frame"""
+        self.frames += 1
+        if pts is not None and len(pts) >= 21:
+            if self.last_hand is not None:
+                self.tracked_frames += 1
+            self.last_hand = (w, h)
+        elif self.last_hand is not None:
+            # The tracker lost the hand; the next hand needs a full palm detection
+            self.lost += 1
+            self.last_hand = None
+
+    def static_result(self, thumbnail, threshold, max_age):
+        """
+        The last result if no pixel of thumbnail differs from the reference
+        thumbnail by more than threshold and the result is at most max_age
+        seconds old, else None
+        Comparing with the analysed frame rather than the previous one keeps
+        slow drift from adding up unnoticed
+        """
+        with self.lock:
+            if (self.result is None or self.reference is None or thumbnail.shape != self.reference.shape
+                    or time.monotonic() - self.result_at > max_age):
+                return None
+            if np.abs(thumbnail.astype(np.int16) - self.reference).max() > threshold:
+                return None
+            self.static_frames += 1
+            return self.result
+
+    def remember(self, thumbnail, result):
+        """Keep the result of an analysed frame for static_result"""
+        with self.lock:
+            self.reference = thumbnail.astype(np.int16)
+            self.result = result
+            self.result_at = time.monotonic()
+
+
+class SessionStore:
+    """
+    Sessions keyed by client session id, with idle expiry and an LRU cap.
+
+    Every session owns two MediaPipe graphs, so at most max_sessions live at
+    once; sessions idle for longer than ttl seconds are dropped first, then the
+    least recently used one.
+    """
+
+    def __init__(self, factory, max_sessions=32, ttl=60.0):
+        self.factory = factory
+        self.max_sessions = max(1, max_sessions)
+        self.ttl = ttl
+
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._expired = 0
+        self._evicted = 0
+
+    def get(self, session_id):
+        """Return the session for session_id, creating it if needed"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                session.last_seen = now
+                return session
+
+        # Build detectors outside the lock, creating a MediaPipe graph is slow
+        session = Session(session_id, self.factory(), self.factory())
+        with self._lock:
+            existing = self._sessions.get(session_id)
+            if existing is not None:
+                existing.last_seen = now
+                return existing
+            while len(self._sessions) >= self.max_sessions:
+                self._sessions.popitem(last=False)
+                self._evicted += 1
+            self._sessions[session_id] = session
+            self._created += 1
+        return session
+
+    def close(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self):
+        with self._lock:
+            self._expire(time.monotonic())
+            sessions = list(self._sessions.values())
+            return {
+                'active': len(sessions),
+                'max_sessions': self.max_sessions,
+                'ttl_seconds': self.ttl,
+                'created': self._created,
+                'expired': self._expired,
+                'evicted': self._evicted,
+                'frames': sum(s.frames for s in sessions),
+                'tracked_frames': sum(s.tracked_frames for s in sessions),
+                'lost': sum(s.lost for s in sessions),
+                'static_frames': sum(s.static_frames for s in sessions),
+            }
+
+    def _expire(self, now):
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_seen <= self.ttl:
+                break
+            del self._sessions[session_id]
+            self._expired += 1
@@ -0,0 +1,340 @@
+"""
+Compiled form of the letter rules from predict_sign_advanced (server.py) and
+Application.predict (final_pred.py).
+
+The CNN picks one of 8 letter groups; the rules then use the hand landmarks to
+correct the group and pick the letter inside it. Here every finger comparison
+is turned into two 4-bit masks (fingers up / fingers down) and the handful of
+distances the rules need are computed once, all as NumPy arrays over a batch
+of hands. Each group rule is an 8x8 (ch1, ch2) lookup table plus a condition,
+applied in the original order, so the result is the same as the if-cascade for
+every frame.
+"""
+import numpy as np
+
+# Finger bits: tip above (up) or below (down) its PIP joint, comparing y values
+INDEX, MIDDLE, RING, PINKY = 1, 2, 4, 8
+ALL_FINGERS = INDEX | MIDDLE | RING | PINKY
+_FINGER_JOINTS = [(6, 8), (10, 12), (14, 16), (18, 20)]
+
+# Landmark pairs the rules measure distances between
+_DISTANCE_PAIRS = [(8, 16), (4, 11), (12, 4), (8, 12), (8, 4), (6, 10)]
+
+VARIANTS = ('server', 'desktop')
+
+
+class HandFeatures:
+    """Landmark coordinates, finger masks and distances for a batch of hands"""
+
+    def __init__(self, pts):
+        self.x = pts[:, :, 0]
+        self.y = pts[:, :, 1]
+
+        self.up = np.zeros(len(pts), dtype=np.int8)
+        self.down = np.zeros(len(pts), dtype=np.int8)
+        for bit, (pip, tip) in enumerate(_FINGER_JOINTS):
+            self.up |= (self.y[:, pip] > self.y[:, tip]).astype(np.int8) << bit
+            self.down |= (self.y[:, pip] < self.y[:, tip]).astype(np.int8) << bit
+
+        a = pts[:, [p[0] for p in _DISTANCE_PAIRS]]
+        b = pts[:, [p[1] for p in _DISTANCE_PAIRS]]
+        dist = np.sqrt(((a[:, :, 0] - b[:, :, 0]) ** 2) + ((a[:, :, 1] - b[:, :, 1]) ** 2))
+        self._dist = {pair: dist[:, i] for i, pair in enumerate(_DISTANCE_PAIRS)}
+
+    def pose(self, up=0, down=0):
+        """True where every finger in up is raised and every finger in down is folded"""
+        return ((self.up & up) == up) & ((self.down & down) == down)
+
+    def dist(self, i, j):
+        return self._dist[(i, j)]
+
+
+def _pair_table(pairs):
+    table = np.zeros((8, 8), dtype=bool)
+    for ch1, ch2 in pairs:
+        table[ch1, ch2] = True
+    return table
+
+
+def _all(*conds):
+    result = conds[0]
+    for cond in conds[1:]:
+        result = result & cond
+    return result
+
+
+class GroupRule:
+    """Move ch1 to group when (ch1, ch2) is in pairs and condition holds"""
+
+    def __init__(self, pairs, group, condition, initial_pair=False):
+        self.table = _pair_table(pairs)
+        self.group = group
+        self.condition = condition
+        # The [o][s] rule tests the CNN's original pair, not the one left by the rule before it
+        self.initial_pair = initial_pair
+
+
+GROUP_RULES = [
+    # condition for [Aemnst]
+    GroupRule([[5, 2], [5, 3], [3, 5], [3, 6], [3, 0], [3, 2], [6, 4], [6, 1], [6, 2], [6, 6], [6, 7], [6, 0], [6, 5],
+               [4, 1], [1, 0], [1, 1], [6, 3], [1, 6], [5, 6], [5, 1], [4, 5], [1, 4], [1, 5], [2, 0], [2, 6], [4, 6],
+               [1, 0], [5, 7], [1, 6], [6, 1], [7, 6], [2, 5], [7, 1], [5, 4], [7, 0], [7, 5], [7, 2]], 0,
+              lambda f: f.pose(down=ALL_FINGERS)),
+    # condition for [o][s]
+    GroupRule([[2, 2], [2, 1]], 0,
+              lambda f: f.x[:, 5] < f.x[:, 4], initial_pair=True),
+    # condition for [c0][aemnst]
+    GroupRule([[0, 0], [0, 6], [0, 2], [0, 5], [0, 1], [0, 7], [5, 2], [7, 6], [7, 1]], 2,
+              lambda f: _all(f.x[:, 0] > f.x[:, 8], f.x[:, 0] > f.x[:, 4], f.x[:, 0] > f.x[:, 12],
+                             f.x[:, 0] > f.x[:, 16], f.x[:, 0] > f.x[:, 20], f.x[:, 5] > f.x[:, 4])),
+    # condition for [c0][aemnst]
+    GroupRule([[6, 0], [6, 6], [6, 2]], 2,
+              lambda f: f.dist(8, 16) < 52),
+    # condition for [gh][bdfikruvw]
+    GroupRule([[1, 4], [1, 5], [1, 6], [1, 3], [1, 0]], 3,
+              lambda f: _all(f.pose(up=INDEX, down=RING | PINKY), f.x[:, 0] < f.x[:, 8], f.x[:, 0] < f.x[:, 12],
+                             f.x[:, 0] < f.x[:, 16], f.x[:, 0] < f.x[:, 20])),
+    # con for [gh][l]
+    GroupRule([[4, 6], [4, 1], [4, 5], [4, 3], [4, 7]], 3,
+              lambda f: f.x[:, 4] > f.x[:, 0]),
+    # con for [gh][pqz]
+    GroupRule([[5, 3], [5, 0], [5, 7], [5, 4], [5, 2], [5, 1], [5, 5]], 3,
+              lambda f: f.y[:, 2] + 15 < f.y[:, 16]),
+    # con for [l][x]
+    GroupRule([[6, 4], [6, 1], [6, 2]], 4,
+              lambda f: f.dist(4, 11) > 55),
+    # con for [l][d]
+    GroupRule([[1, 4], [1, 6], [1, 1]], 4,
+              lambda f: (f.dist(4, 11) > 50) & f.pose(up=INDEX, down=MIDDLE | RING | PINKY)),
+    # con for [l][gh]
+    GroupRule([[3, 6], [3, 4]], 4,
+              lambda f: f.x[:, 4] < f.x[:, 0]),
+    # con for [l][c0]
+    GroupRule([[2, 2], [2, 5], [2, 4]], 4,
+              lambda f: f.x[:, 1] < f.x[:, 12]),
+    # con for [gh][z]
+    GroupRule([[3, 6], [3, 5], [3, 4]], 5,
+              lambda f: f.pose(up=INDEX, down=MIDDLE | RING | PINKY) & (f.y[:, 4] > f.y[:, 10])),
+    # con for [gh][pq]
+    GroupRule([[3, 2], [3, 1], [3, 6]], 5,
+              lambda f: _all(f.y[:, 4] + 17 > f.y[:, 8], f.y[:, 4] + 17 > f.y[:, 12],
+                             f.y[:, 4] + 17 > f.y[:, 16], f.y[:, 4] + 17 > f.y[:, 20])),
+    # con for [l][pqz]
+    GroupRule([[4, 4], [4, 5], [4, 2], [7, 5], [7, 6], [7, 0]], 5,
+              lambda f: f.x[:, 4] > f.x[:, 0]),
+    # con for [pqz][aemnst]
+    GroupRule([[0, 2], [0, 6], [0, 1], [0, 5], [0, 0], [0, 7], [0, 4], [0, 3], [2, 7]], 5,
+              lambda f: _all(f.x[:, 0] < f.x[:, 8], f.x[:, 0] < f.x[:, 12],
+                             f.x[:, 0] < f.x[:, 16], f.x[:, 0] < f.x[:, 20])),
+    # con for [pqz][yj]
+    GroupRule([[5, 7], [5, 2], [5, 6]], 7,
+              lambda f: f.x[:, 3] < f.x[:, 0]),
+    # con for [l][yj]
+    GroupRule([[4, 6], [4, 2], [4, 4], [4, 1], [4, 5], [4, 7]], 7,
+              lambda f: f.y[:, 6] < f.y[:, 8]),
+    # con for [x][yj]
+    GroupRule([[6, 7], [0, 7], [0, 1], [0, 0], [6, 4], [6, 6], [6, 5], [6, 1]], 7,
+              lambda f: f.y[:, 18] > f.y[:, 20]),
+    # condition for [x][aemnst]
+    GroupRule([[0, 4], [0, 2], [0, 3], [0, 1], [0, 6]], 6,
+              lambda f: f.x[:, 5] > f.x[:, 16]),
+    # condition for [yj][x]
+    GroupRule([[7, 2]], 6,
+              lambda f: (f.y[:, 18] < f.y[:, 20]) & (f.y[:, 8] < f.y[:, 10])),
+    # condition for [c0][x]
+    GroupRule([[2, 1], [2, 2], [2, 6], [2, 7], [2, 0]], 6,
+              lambda f: f.dist(8, 16) > 50),
+    # con for [l][x]
+    GroupRule([[4, 6], [4, 2], [4, 1], [4, 4]], 6,
+              lambda f: f.dist(4, 11) < 60),
+    # con for [x][d]
+    GroupRule([[1, 4], [1, 6], [1, 0], [1, 2]], 6,
+              lambda f: f.x[:, 5] - f.x[:, 4] - 15 > 0),
+    # con for [b][pqz]
+    GroupRule([[5, 0], [5, 1], [5, 4], [5, 5], [5, 6], [6, 1], [7, 6], [0, 2], [7, 1], [7, 4], [6, 6], [7, 2], [5, 0],
+               [6, 3], [6, 4], [7, 5], [7, 2]], 1,
+              lambda f: f.pose(up=ALL_FINGERS)),
+    # con for [f][pqz]
+    GroupRule([[6, 1], [6, 0], [0, 3], [6, 4], [2, 2], [0, 6], [6, 2], [7, 6], [4, 6], [4, 1], [4, 2], [0, 2], [7, 1],
+               [7, 4], [6, 6], [7, 2], [7, 5], [7, 2]], 1,
+              lambda f: f.pose(up=MIDDLE | RING | PINKY, down=INDEX)),
+    GroupRule([[6, 1], [6, 0], [4, 2], [4, 1], [4, 6], [4, 4]], 1,
+              lambda f: f.pose(up=MIDDLE | RING | PINKY)),
+    # con for [d][pqz]
+    GroupRule([[5, 0], [3, 4], [3, 0], [3, 1], [3, 5], [5, 5], [5, 4], [5, 1], [7, 6]], 1,
+              lambda f: _all(f.pose(up=INDEX, down=MIDDLE | RING | PINKY), f.x[:, 2] < f.x[:, 0],
+                             f.y[:, 4] > f.y[:, 14])),
+    GroupRule([[4, 1], [4, 2], [4, 4]], 1,
+              lambda f: (f.dist(4, 11) < 50) & f.pose(up=INDEX, down=MIDDLE | RING | PINKY)),
+    GroupRule([[3, 4], [3, 0], [3, 1], [3, 5], [3, 6]], 1,
+              lambda f: _all(f.pose(up=INDEX, down=MIDDLE | RING | PINKY), f.x[:, 2] < f.x[:, 0],
+                             f.y[:, 14] < f.y[:, 4])),
+    GroupRule([[6, 6], [6, 4], [6, 1], [6, 2]], 1,
+              lambda f: f.x[:, 5] - f.x[:, 4] - 15 < 0),
+    # con for [i][pqz]
+    GroupRule([[5, 4], [5, 5], [5, 1], [0, 3], [0, 7], [5, 0], [0, 2], [6, 2], [7, 5], [7, 1], [7, 6], [7, 7]], 1,
+              lambda f: f.pose(up=PINKY, down=INDEX | MIDDLE | RING)),
+    # con for [yj][bfdi]
+    GroupRule([[1, 5], [1, 7], [1, 1], [1, 6], [1, 3], [1, 0]], 7,
+              lambda f: (f.x[:, 4] < f.x[:, 5] + 15) & f.pose(up=PINKY, down=INDEX | MIDDLE | RING)),
+    # con for [uvr]
+    GroupRule([[5, 5], [5, 0], [5, 4], [5, 1], [4, 6], [4, 1], [7, 6], [3, 0], [3, 5]], 1,
+              lambda f: f.pose(up=INDEX | MIDDLE, down=RING | PINKY) & (f.y[:, 4] > f.y[:, 14])),
+    # con for [w]
+    GroupRule([[3, 5], [3, 0], [3, 6], [5, 1], [4, 1], [2, 0], [5, 0], [5, 5]], 1,
+              lambda f: _all(~_all(f.x[:, 0] + 13 < f.x[:, 8], f.x[:, 0] + 13 < f.x[:, 12],
+                                   f.x[:, 0] + 13 < f.x[:, 16], f.x[:, 0] + 13 < f.x[:, 20]),
+                             ~_all(f.x[:, 0] > f.x[:, 8], f.x[:, 0] > f.x[:, 12],
+                                   f.x[:, 0] > f.x[:, 16], f.x[:, 0] > f.x[:, 20]),
+                             f.dist(4, 11) < 50)),
+    # con for [w]
+    GroupRule([[5, 0], [5, 5], [0, 1]], 1,
+              lambda f: f.pose(up=INDEX | MIDDLE | RING)),
+]
+
+
+def _override(letters, rules):
+    """Apply (condition, letter) pairs in order, later matches win"""
+    for cond, letter in rules:
+        letters = np.where(cond, letter, letters)
+    return letters
+
+
+def _group_letters(group, f, n):
+    """Letter for every hand in the batch, assuming it ended up in group"""
+    x, y = f.x, f.y
+    if group == 0:
+        return _override(np.full(n, 'S', dtype='<U9'), [
+            (_all(x[:, 4] < x[:, 6], x[:, 4] < x[:, 10], x[:, 4] < x[:, 14], x[:, 4] < x[:, 18]), 'A'),
+            (_all(x[:, 4] > x[:, 6], x[:, 4] < x[:, 10], x[:, 4] < x[:, 14], x[:, 4] < x[:, 18],
+                  y[:, 4] < y[:, 14], y[:, 4] < y[:, 18]), 'T'),
+            (_all(y[:, 4] > y[:, 8], y[:, 4] > y[:, 12], y[:, 4] > y[:, 16], y[:, 4] > y[:, 20]), 'E'),
+            (_all(x[:, 4] > x[:, 6], x[:, 4] > x[:, 10], x[:, 4] > x[:, 14], y[:, 4] < y[:, 18]), 'M'),
+            (_all(x[:, 4] > x[:, 6], x[:, 4] > x[:, 10], y[:, 4] < y[:, 18], y[:, 4] < y[:, 14]), 'N'),
+        ])
+    if group == 2:
+        return np.where(f.dist(12, 4) > 42, 'C', 'O')
+    if group == 3:
+        return np.where(f.dist(8, 12) > 72, 'G', 'H')
+    if group == 7:
+        return np.where(f.dist(8, 4) > 42, 'Y', 'J')
+    if group == 4:
+        return np.full(n, 'L', dtype='<U9')
+    if group == 6:
+        return np.full(n, 'X', dtype='<U9')
+    if group == 5:
+        zq = np.where(y[:, 8] < y[:, 5], 'Z', 'Q')
+        return np.where(_all(x[:, 4] > x[:, 12], x[:, 4] > x[:, 16], x[:, 4] > x[:, 20]), zq, 'P')
+
+    # group 1; a hand matching none of these keeps the group number
+    uv = f.pose(up=INDEX | MIDDLE, down=RING | PINKY)
+    spread = f.dist(8, 12) - f.dist(6, 10)
+    return _override(np.full(n, '1', dtype='<U9'), [
+        (f.pose(up=ALL_FINGERS), 'B'),
+        (f.pose(up=INDEX, down=MIDDLE | RING | PINKY), 'D'),
+        (f.pose(up=MIDDLE | RING | PINKY, down=INDEX), 'F'),
+        (f.pose(up=PINKY, down=INDEX | MIDDLE | RING), 'I'),
+        (f.pose(up=INDEX | MIDDLE | RING, down=PINKY), 'W'),
+        (uv & (y[:, 4] < y[:, 9]), 'K'),
+        ((spread < 8) & uv, 'U'),
+        ((spread >= 8) & uv & (y[:, 4] > y[:, 9]), 'V'),
+        ((x[:, 8] > x[:, 12]) & uv, 'R'),
+    ])
+
+
+def _as_points(pts):
+    """(N, 21, 2) float64 array of N landmark lists or an (N, 21, 2+) array"""
+    if isinstance(pts, np.ndarray):
+        return pts[:, :21, :2].astype(np.float64)
+    return np.asarray([np.asarray(p, dtype=np.float64)[:21, :2] for p in pts])
+
+
+class SignRuleEngine:
+    """
+    Applies the letter rules to CNN group probabilities and hand landmarks.
+
+    variant='server' ends with the web app's gestures (space, confirm, backspace
+    after B/C/H/F/X), variant='desktop' with final_pred.py's (space, next, and a
+    backspace check that runs for every letter, as it does there).
+    """
+
+    def __init__(self, variant='server'):
+        if variant not in VARIANTS:
+            raise ValueError(f"Unknown rule variant '{variant}', expected one of {VARIANTS}")
+        self.variant = variant
+
+    def classify(self, prob, pts):
+        """
+        Letter for one hand
+        Returns: (letter, confidence)
+        """
+        letters, confidences = self.classify_batch(np.asarray(prob)[None], [pts])
+        return str(letters[0]), float(confidences[0])
+
+    def classify_batch(self, probs, pts):
+        """
+        Letters for N hands at once
+        probs: (N, 8) group probabilities, pts: N landmark lists or an (N, 21, 2+) array
+        Returns: (letters array, confidences array)
+        """
+        probs = np.array(probs, dtype='float32')
+        pts = _as_points(pts)
+        n = len(probs)
+        rows = np.arange(n)
+
+        # Top two groups, zeroing the winner like the original cascade
+        ch1 = probs.argmax(axis=1)
+        confidences = probs[rows, ch1].astype(np.float64)
+        probs[rows, ch1] = 0
+        ch2 = probs.argmax(axis=1)
+
+        f = HandFeatures(pts)
+        initial = ch1
+        for rule in GROUP_RULES:
+            hit = rule.table[initial if rule.initial_pair else ch1, ch2]
+            if not hit.any():
+                continue
+            ch1 = np.where(hit & rule.condition(f), rule.group, ch1)
+
+        letters = np.full(n, '', dtype='<U9')
+        for group in np.unique(ch1):
+            selected = ch1 == group
+            letters[selected] = _group_letters(int(group), f, n)[selected]
+
+        letters = self._gestures(letters, f)
+        return letters, confidences
+
+    def apply_gestures(self, letters, pts):
+        """
+        Only the gesture pass (space, confirm/next, backspace) over letters chosen
+        some other way, e.g. by the template matcher
+        letters: N letters, pts: N landmark lists or an (N, 21, 2+) array
+        Returns: letters array
+        """
+        letters = np.asarray(letters, dtype='<U9')
+        return self._gestures(letters, HandFeatures(_as_points(pts)))
+
+    def _gestures(self, letters, f):
+        x, y = f.x, f.y
+
+        # Space detection
+        space = np.isin(letters, ['1', 'E', 'S', 'X', 'Y', 'B']) & f.pose(up=INDEX | PINKY, down=MIDDLE | RING)
+        letters = np.where(space, ' ', letters)
+
+        if self.variant == 'server':
+            # "Confirm" gesture - open palm, all fingertips above their joints and wrist above the knuckles
+            confirm = _all(y[:, 4] < y[:, 3], y[:, 8] < y[:, 6], y[:, 12] < y[:, 10], y[:, 16] < y[:, 14],
+                           y[:, 20] < y[:, 18], y[:, 0] < y[:, 5], y[:, 0] < y[:, 9], y[:, 0] < y[:, 13])
+            letters = np.where(confirm, 'confirm', letters)
+            backspace_letters = np.isin(letters, ['B', 'C', 'H', 'F', 'X'])
+        else:
+            nxt = np.isin(letters, ['E', 'Y', 'B']) & (x[:, 4] < x[:, 5]) & f.pose(up=ALL_FINGERS)
+            letters = np.where(nxt, 'next', letters)
+            backspace_letters = np.ones(len(letters), dtype=bool)
+
+        # Backspace gesture detection
+        backspace = _all(backspace_letters,
+                         x[:, 0] > x[:, 8], x[:, 0] > x[:, 12], x[:, 0] > x[:, 16], x[:, 0] > x[:, 20],
+                         y[:, 4] < y[:, 8], y[:, 4] < y[:, 12], y[:, 4] < y[:, 16], y[:, 4] < y[:, 20],
+                         y[:, 4] < y[:, 6], y[:, 4] < y[:, 10], y[:, 4] < y[:, 14], y[:, 4] < y[:, 18])
+        return np.where(backspace, 'Backspace', letters)
@@ -1,6 +1,8 @@
 import { useState, useRef, useEffect } from 'react'
 
 const API_URL = 'http://localhost:5000'
+// Lets the server keep a hand tracker per browser tab instead of re-detecting every frame
+const SESSION_ID = crypto.randomUUID()
 
 function App() {
   const videoRef = useRef(null)
@@ -16,6 +18,8 @@ function App() {
   const [confirmMode, setConfirmMode] = useState(false)
   const streamRef = useRef(null)
   const intervalRef = useRef(null)
+  // predictSign runs from setInterval, so it reads debug mode through a ref
+  const debugModeRef = useRef(false)
 
   useEffect(() => {
     return () => {
@@ -28,6 +32,10 @@ function App() {
     }
   }, [])
 
+  useEffect(() => {
+    debugModeRef.current = debugMode
+  }, [debugMode])
+
   const startCamera = async () => {
     try {
       const stream = await navigator.mediaDevices.getUserMedia({ 
@@ -97,11 +105,12 @@ function App() {
     canvas.height = video.videoHeight
     ctx.drawImage(video, 0, 0)
     
-    return canvas.toDataURL('image/jpeg', 0.8)
+    // Raw JPEG bytes: smaller than a base64 data URL and cheaper to decode server-side
+    return new Promise(resolve => canvas.toBlob(resolve, 'image/jpeg', 0.8))
   }
 
   const predictSign = async () => {
-    const imageData = captureFrame()
+    const imageData = await captureFrame()
     if (!imageData) {
       // Only log occasionally to avoid spam
       if (Math.random() < 0.01) {
@@ -111,12 +120,15 @@ function App() {
     }
 
     try {
-      const response = await fetch(`${API_URL}/predict`, {
+      // The skeleton canvas is only encoded and sent when the debug panel shows it
+      const query = debugModeRef.current ? '?debug=1' : ''
+      const response = await fetch(`${API_URL}/predict${query}`, {
         method: 'POST',
         headers: {
-          'Content-Type': 'application/json',
+          'Content-Type': 'image/jpeg',
+          'X-Session-Id': SESSION_ID,
         },
-        body: JSON.stringify({ image: imageData }),
+        body: imageData,
       })
 
       if (!response.ok) {
@@ -135,7 +147,6 @@ function App() {
       setCurrentLetter(data.text || '—')
       setConfidence(data.confidence || 0)
       
-      // Always update debug image if available, not just in debug mode
       if (data.white_canvas) {
         setDebugImage(data.white_canvas)
       }
@@ -171,7 +182,8 @@ function App() {
         headers: {
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify({ text: outputText }),
+        // Only the latest text matters, drop anything still waiting to be spoken
+        body: JSON.stringify({ text: outputText, replace: true }),
       })
     } catch (error) {
       console.error('Speak error:', error)
@@ -0,0 +1,183 @@
+"""
+Nearest-neighbour letter classifier over normalized landmark templates.
+
+Every AtoZ_3.1/<letter>/ image is turned back into its 21 landmarks
+(landmark_index.py), normalized like landmark_model.py and kept
+in one float32 matrix. A frame is classified by a brute-force NumPy distance to
+all templates and a vote of the k nearest, well under a millisecond on a CPU.
+
+    python template_matcher.py build --dataset AtoZ_3.1 --out template_index.npz
+    python template_matcher.py report --dataset AtoZ_3.1 --model cnn8grps_rad1_model.h5 --json report.json
+
+report holds out every 5th image of each letter and compares the matcher with
+the CNN + rules path of server.predict_sign_advanced on the same images.
+"""
+import argparse
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from landmark_index import LANDMARK_INDEX_FILE, update_index
+from landmark_model import normalize_landmarks
+
+TEMPLATE_INDEX_FILE = 'template_index.npz'
+
+# Every HOLD_OUT_EVERY-th recovered image of each letter is kept out of the
+# templates when the matcher is scored on the dataset itself
+HOLD_OUT_EVERY = 5
+
+
+def dataset_landmarks(dataset_dir, index_path=LANDMARK_INDEX_FILE):
+    """
+    Landmarks of the dataset images a skeleton could be fitted to, read from the
+    landmark index (brought up to date first, only new images are decoded)
+    Returns: (landmarks (N, 21, 2) float32, labels (N,), paths, total images)
+    """
+    index = update_index(dataset_dir, index_path)
+    valid = index['valid']
+    paths = [os.path.join(dataset_dir, p) for p in index['paths'][valid]]
+    return index['landmarks'][valid].astype(np.float32), index['labels'][valid], paths, len(valid)
+
+
+def held_out_mask(labels, every=HOLD_OUT_EVERY):
+    """True for every `every`-th entry of each label, the fixed fold scored against the other templates"""
+    labels = np.asarray(labels)
+    held_out = np.zeros(len(labels), bool)
+    for letter in np.unique(labels):
+        held_out[np.nonzero(labels == letter)[0][::every]] = True
+    return held_out
+
+
+class TemplateMatcher:
+    """k-nearest-neighbour vote over normalized landmark templates"""
+
+    def __init__(self, landmarks, labels, k=5):
+        self.landmarks = np.asarray(landmarks, dtype=np.float32)
+        self.templates = normalize_landmarks(self.landmarks)
+        self.sq_norms = (self.templates ** 2).sum(axis=1)
+        self.letters, self.label_ids = np.unique(np.asarray(labels), return_inverse=True)
+        self.k = max(1, min(k, len(self.templates)))
+
+    @classmethod
+    def load(cls, path=TEMPLATE_INDEX_FILE, k=5):
+        data = np.load(path)
+        return cls(data['landmarks'], data['labels'], k=k)
+
+    def save(self, path=TEMPLATE_INDEX_FILE):
+        np.savez_compressed(path, landmarks=self.landmarks, labels=self.letters[self.label_ids])
+
+    def predict(self, pts):
+        """
+        Letters for a batch of hands
+        pts: list of landmark lists or an (N, 21, 2+) array
+        Returns: (letters (N,), confidences (N,) - share of the k votes)
+        """
+        x = normalize_landmarks(pts)
+        # |x - t|^2 without the |x|^2 term, which is the same for every template
+        dist = self.sq_norms[None] - 2 * (x @ self.templates.T)
+        nearest = np.argpartition(dist, self.k - 1, axis=1)[:, :self.k]
+
+        votes = np.zeros((len(x), len(self.letters)), np.int32)
+        np.add.at(votes, (np.arange(len(x))[:, None], self.label_ids[nearest]), 1)
+        best = votes.argmax(axis=1)
+        return self.letters[best], (votes[np.arange(len(x)), best] / self.k).astype(np.float32)
+
+    def classify(self, pts):
+        """Letter for one hand: (letter, confidence)"""
+        letters, confidences = self.predict([pts])
+        return str(letters[0]), float(confidences[0])
+
+
+def percentiles(times_ms):
+    return {'p50': float(np.percentile(times_ms, 50)), 'p95': float(np.percentile(times_ms, 95))} if times_ms else {}
+
+
+def accuracy(predicted, labels):
+    per_letter = {str(letter): float((predicted[labels == letter] == letter).mean())
+                  for letter in np.unique(labels)}
+    return float((predicted == labels).mean()), per_letter
+
+
+def report(args):
+    landmarks, labels, paths, images = dataset_landmarks(args.dataset, args.index)
+    held_out = held_out_mask(labels)
+
+    matcher = TemplateMatcher(landmarks[~held_out], labels[~held_out], k=args.k)
+    test_pts, test_labels = landmarks[held_out], labels[held_out]
+
+    times = []
+    predicted = []
+    for pts in test_pts:
+        start = time.perf_counter()
+        predicted.append(matcher.classify(pts)[0])
+        times.append((time.perf_counter() - start) * 1000)
+    predicted = np.array(predicted)
+    start = time.perf_counter()
+    matcher.predict(test_pts)
+    batch_ms = (time.perf_counter() - start) * 1000
+
+    overall, per_letter = accuracy(predicted, test_labels)
+    result = {
+        'images': images,
+        'recovered': int(len(labels)),
+        'templates': int(len(matcher.templates)),
+        'held_out': int(held_out.sum()),
+        'template_matcher': {
+            'accuracy': overall,
+            'per_letter': per_letter,
+            'latency_ms': percentiles(times),
+            'batch_ms_per_frame': batch_ms / max(1, len(test_pts)),
+        },
+    }
+
+    if args.model:
+        from inference_backend import load_backend
+        from sign_rules import SignRuleEngine
+        model = load_backend(args.model)
+        rules = SignRuleEngine('server')
+
+        times = []
+        cnn = []
+        for path, pts in zip(np.array(paths)[held_out], test_pts):
+            canvas = cv2.imread(path)
+            start = time.perf_counter()
+            # Same as predict_sign_advanced: CNN groups, then the letter rules
+            prob = np.array(model.predict(canvas.reshape(1, 400, 400, 3), verbose=0)[0], dtype='float32')
+            cnn.append(rules.classify(prob, np.rint(pts).astype(int).tolist())[0])
+            times.append((time.perf_counter() - start) * 1000)
+        cnn = np.array(cnn)
+        overall, per_letter = accuracy(cnn, test_labels)
+        result['predict_sign_advanced'] = {'accuracy': overall, 'per_letter': per_letter,
+                                           'latency_ms': percentiles(times)}
+        result['agreement'] = float((cnn == predicted).mean())
+
+    print(json.dumps(result, indent=2))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['build', 'report'])
+    parser.add_argument('--dataset', default='AtoZ_3.1')
+    parser.add_argument('--index', default=LANDMARK_INDEX_FILE, help='landmark index of the dataset')
+    parser.add_argument('--out', default=TEMPLATE_INDEX_FILE, help='templates written by build')
+    parser.add_argument('--k', type=int, default=5, help='neighbours that vote')
+    parser.add_argument('--model', help='report: also run the CNN + rules on the held-out images')
+    parser.add_argument('--json', help='report: write the report to this file')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        landmarks, labels, _, _ = dataset_landmarks(args.dataset, args.index)
+        TemplateMatcher(landmarks, labels, k=args.k).save(args.out)
+        print(f"Saved {len(labels)} templates to {args.out}")
+    else:
+        report(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+import os
+import threading
+import time
+
+import pytest
+
+from audio_cache import AudioCache, normalize_text
+
+
+def write(text):
+    def render(path):
+        with open(path, 'wb') as f:
+            f.write(b'RIFF' + text.encode())
+    return render
+
+
+def test_normalize_collapses_whitespace_and_keeps_case():
+    assert normalize_text('  Hello \n  USA\t') == 'Hello USA'
+    assert normalize_text('NASA') != normalize_text('nasa')
+
+
+def test_key(tmp_path):
+    cache = AudioCache(str(tmp_path))
+    assert cache.key('hello  world', {}) == cache.key(' hello world ', {})
+    assert cache.key('NASA', {}) != cache.key('nasa', {})
+    assert cache.key('hi', {'rate': 150}) != cache.key('hi', {'rate': 120})
+    assert cache.key('hi', {'rate': 150, 'volume': 0.5}) == cache.key('hi', {'volume': 0.5, 'rate': 150})
+
+
+def test_renders_once_then_hits(tmp_path):
+    cache = AudioCache(str(tmp_path))
+    renders = []
+    key = cache.key('hi', {})
+
+    def render(path):
+        renders.append(path)
+        write('hi')(path)
+
+    f, hit = cache.get_or_render(key, render)
+    with f:
+        assert f.read() == b'RIFFhi' and not hit
+    f, hit = cache.get_or_render(key, render)
+    f.close()
+    assert hit and len(renders) == 1
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+
+def test_concurrent_misses_share_one_render(tmp_path):
+    cache = AudioCache(str(tmp_path))
+    key = cache.key('together', {})
+    renders = []
+
+    def render(path):
+        renders.append(path)
+        time.sleep(0.1)
+        write('together')(path)
+
+    results = []
+
+    def request():
+        f, _ = cache.get_or_render(key, render, timeout=5)
+        with f:
+            results.append(f.read())
+
+    threads = [threading.Thread(target=request) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [b'RIFFtogether'] * 4
+    assert len(renders) == 1
+
+
+def test_failed_render_is_not_cached(tmp_path):
+    cache = AudioCache(str(tmp_path))
+    key = cache.key('boom', {})
+
+    def render(path):
+        raise RuntimeError('driver gone')
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_render(key, render)
+    with pytest.raises(RuntimeError):
+        # Nothing written counts as a failure too
+        cache.get_or_render(key, lambda path: None)
+    assert os.listdir(tmp_path) == []
+    assert cache.stats()['files'] == 0
+
+
+def test_evicts_least_recently_used_and_survives_restart(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=20)
+    keys = [cache.key(text, {}) for text in ('aaaa', 'bbbb', 'cccc')]
+    for key, text in zip(keys, ('aaaa', 'bbbb', 'cccc')):
+        f, _ = cache.get_or_render(key, write(text))
+        f.close()
+    # 8 bytes each: only two fit, so the first one had to go
+    stats = cache.stats()
+    assert stats['files'] == 2 and stats['evicted'] == 1 and stats['bytes'] <= 20
+    assert not os.path.exists(cache.path(keys[0]))
+
+    again = AudioCache(str(tmp_path), max_bytes=20)
+    assert again.stats()['files'] == stats['files']
+    f, hit = again.get_or_render(keys[2], write('cccc'))
+    f.close()
+    assert hit
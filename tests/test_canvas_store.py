@@ -0,0 +1,47 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from canvas_store import CANVAS_SHAPE, CanvasStore, build_store
+
+
+@pytest.fixture
+def store(tmp_path):
+    dataset = tmp_path / 'AtoZ'
+    shade = 0
+    for letter in 'BA':
+        os.makedirs(dataset / letter)
+        for name in ('2.jpg', '1.jpg'):
+            cv2.imwrite(str(dataset / letter / name), np.full(CANVAS_SHAPE, shade, np.uint8))
+            shade += 60
+    # Wrong size: kept as a row, marked invalid
+    cv2.imwrite(str(dataset / 'B' / '3.jpg'), np.zeros((10, 10, 3), np.uint8))
+    path = str(tmp_path / 'canvases.npy')
+    assert build_store(str(dataset), path) == 5
+    return CanvasStore(path)
+
+
+def test_rows_in_letter_then_file_order(store):
+    assert list(store.labels) == ['A', 'A', 'B', 'B', 'B']
+    assert list(store.paths) == [os.path.join(*p) for p in
+                                 (('A', '1.jpg'), ('A', '2.jpg'), ('B', '1.jpg'), ('B', '2.jpg'), ('B', '3.jpg'))]
+    assert list(store.valid) == [True, True, True, True, False]
+    assert (store[4] == 255).all()
+
+
+def test_take_keeps_the_callers_order(store):
+    rows = [3, 0, 3, 1, 4]
+    taken = store.take(rows)
+    assert taken.shape == (5,) + CANVAS_SHAPE
+    for canvas, row in zip(taken, rows):
+        assert (canvas == store[row]).all()
+    assert store.take([]).shape == (0,) + CANVAS_SHAPE
+
+
+def test_batches_are_views(store):
+    batches = list(store.batches(batch_size=2))
+    assert [first for _, _, first in batches] == [0, 2, 4]
+    canvases, labels, _ = batches[1]
+    assert list(labels) == ['B', 'B'] and not canvases.flags.owndata
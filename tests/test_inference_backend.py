@@ -0,0 +1,100 @@
+import os
+import sys
+import types
+
+import numpy as np
+import pytest
+
+import inference_backend
+from inference_backend import TFLiteBackend, backend_name, resolve_model_file
+
+
+class FakeInterpreter:
+    """Stands in for the TFLite interpreter: the output of each row is its mean, twice"""
+    created = []
+
+    def __init__(self, model_path, num_threads=None):
+        self.shape = np.array([1, 4, 4, 3])
+        self.allocations = 0
+        self.runs = []
+        FakeInterpreter.created.append(self)
+
+    def get_input_details(self):
+        return [{'index': 0, 'shape': self.shape, 'dtype': np.float32, 'quantization': (0.0, 0)}]
+
+    def get_output_details(self):
+        return [{'index': 1, 'shape': np.array([self.shape[0], 2]), 'dtype': np.float32,
+                 'quantization': (0.0, 0)}]
+
+    def resize_tensor_input(self, index, shape):
+        self.shape = np.array(shape)
+
+    def allocate_tensors(self):
+        self.allocations += 1
+
+    def set_tensor(self, index, value):
+        assert value.shape == tuple(self.shape)
+        self.value = value
+
+    def invoke(self):
+        self.runs.append(len(self.value))
+
+    def get_tensor(self, index):
+        means = self.value.reshape(len(self.value), -1).mean(axis=1)
+        return np.stack([means, means], axis=1)
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    module = types.ModuleType('tflite_runtime.interpreter')
+    module.Interpreter = FakeInterpreter
+    monkeypatch.setitem(sys.modules, 'tflite_runtime', types.ModuleType('tflite_runtime'))
+    monkeypatch.setitem(sys.modules, 'tflite_runtime.interpreter', module)
+    FakeInterpreter.created = []
+    return TFLiteBackend('model.tflite', max_batch_size=8)
+
+
+def test_batches_split_into_power_of_two_chunks(backend):
+    batch = np.arange(11, dtype=np.float32)[:, None, None, None] * np.ones((11, 4, 4, 3), np.float32)
+    out = backend.predict(batch)
+    assert out.dtype == np.float32
+    assert np.allclose(out[:, 0], np.arange(11))
+    runs = {int(i.shape[0]): i.runs for i in FakeInterpreter.created}
+    assert runs == {1: [1], 2: [2], 8: [8]}
+
+
+def test_interpreters_are_allocated_once_per_size(backend):
+    for size in (1, 2, 1, 2, 3, 20):
+        assert backend.predict(np.zeros((size, 4, 4, 3), np.float32)).shape == (size, 2)
+    assert sorted(int(i.shape[0]) for i in FakeInterpreter.created) == [1, 2, 4, 8]
+    assert all(i.allocations == 1 for i in FakeInterpreter.created)
+
+
+def test_empty_batch(backend):
+    assert backend.predict(np.zeros((0, 4, 4, 3), np.float32)).shape == (0, 2)
+
+
+def test_max_batch_size_rounds_down_to_a_power_of_two(backend):
+    assert TFLiteBackend('model.tflite', max_batch_size=12).max_batch_size == 8
+    assert TFLiteBackend('model.tflite', max_batch_size=0).max_batch_size == 1
+
+
+def test_quantized_round_trip():
+    detail = {'dtype': np.int8, 'quantization': (0.5, -3)}
+    values = np.array([-100.0, 0.0, 1.0, 100.0], np.float32)
+    quantized = inference_backend._quantize(values, detail)
+    assert quantized.dtype == np.int8 and quantized.tolist() == [-128, -3, -1, 127]
+    assert inference_backend._dequantize(quantized, detail).tolist() == [-62.5, 0.0, 1.0, 65.0]
+
+
+def test_resolve_prefers_an_up_to_date_export(tmp_path):
+    keras_file = tmp_path / 'model.h5'
+    exported = tmp_path / 'model.tflite'
+    keras_file.write_bytes(b'h5')
+    assert resolve_model_file(str(keras_file)) == str(keras_file)
+    exported.write_bytes(b'tflite')
+    os.utime(keras_file, (1000, 1000))
+    assert resolve_model_file(str(keras_file)) == str(exported)
+    os.utime(exported, (500, 500))
+    assert resolve_model_file(str(keras_file)) == str(keras_file)
+    assert backend_name('x.ONNX') == 'onnx' and backend_name('x.pb') == 'keras'
@@ -0,0 +1,58 @@
+import numpy as np
+
+import prediction_cache
+from prediction_cache import PredictionCache
+
+
+def hand(offset=0):
+    return np.arange(42).reshape(21, 2) * 4 + offset
+
+
+def test_nearby_hands_share_a_key():
+    cache = PredictionCache(grid=4)
+    assert cache.key(hand(), (200, 180)) == cache.key(hand() + 1, (201, 182))
+    assert cache.key(hand(), (200, 180)) != cache.key(hand() + 4, (200, 180))
+
+
+def test_entries_belong_to_their_session():
+    cache = PredictionCache()
+    key = cache.key(hand(), (200, 200))
+    cache.put('a', key, 'probs')
+    assert cache.get('a', key) == 'probs'
+    assert cache.get('b', key) is None
+    cache.close('a')
+    assert cache.get('a', key) is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_session_and_total_limits():
+    cache = PredictionCache(max_entries=3, per_session=2)
+    keys = [cache.key(hand(i * 4), (200, 200)) for i in range(4)]
+    for key in keys[:3]:
+        cache.put('a', key, key)
+    assert cache.get('a', keys[0]) is None and cache.get('a', keys[2]) is not None
+    cache.put('b', keys[0], 0)
+    cache.put('b', keys[1], 1)
+    # Three entries at most: the least recently used of 'a' went
+    assert cache.stats()['entries'] == 3
+    assert cache.get('a', keys[1]) is None
+
+
+def test_expired_entries_are_dropped(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(prediction_cache.time, 'monotonic', lambda: now[0])
+    cache = PredictionCache(ttl=5)
+    key = cache.key(hand(), (200, 200))
+    cache.put(None, key, 'probs')
+    now[0] += 4
+    assert cache.get(None, key) == 'probs'
+    now[0] += 2
+    assert cache.get(None, key) is None
+    assert cache.stats()['expired'] == 1
+
+
+def test_disabled():
+    cache = PredictionCache(max_entries=0)
+    key = cache.key(hand(), (200, 200))
+    cache.put(None, key, 'probs')
+    assert not cache.enabled and cache.get(None, key) is None
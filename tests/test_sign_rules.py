@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from legacy_sign_rules import apply_sign_rules
+from sign_rules import SignRuleEngine
+
+
+def random_hands(count, seed=0):
+    """Group probabilities and landmarks scattered over a hand-sized box, so every
+    comparison goes both ways and the distances straddle the rule thresholds"""
+    rng = np.random.default_rng(seed)
+    probs = rng.random((count, 8)).astype('float32')
+    pts = rng.integers(0, 120, (count, 21, 2))
+    return probs, pts
+
+
+def test_matches_the_original_cascade():
+    engine = SignRuleEngine('server')
+    probs, pts = random_hands(3000)
+    seen = set()
+    for prob, hand in zip(probs, pts):
+        expected = apply_sign_rules(prob, hand.tolist())
+        letter, confidence = engine.classify(prob, hand.tolist())
+        assert letter == expected[0]
+        assert confidence == pytest.approx(expected[1])
+        seen.add(letter)
+    # The sample reaches the gestures and most letters, not just a few branches
+    assert {' ', 'confirm', 'Backspace'} <= seen
+    assert len(seen) > 25
+
+
+def test_batch_matches_single():
+    engine = SignRuleEngine('server')
+    probs, pts = random_hands(500, seed=1)
+    letters, confidences = engine.classify_batch(probs, pts)
+    for prob, hand, letter, confidence in zip(probs, pts, letters, confidences):
+        assert (letter, confidence) == pytest.approx(engine.classify(prob, hand.tolist()))
+
+
+def test_gestures_alone_keep_classified_letters():
+    engine = SignRuleEngine('server')
+    probs, pts = random_hands(500, seed=2)
+    letters, _ = engine.classify_batch(probs, pts)
+    assert (engine.apply_gestures(letters, pts) == letters).all()
+
+
+def test_unknown_variant():
+    with pytest.raises(ValueError):
+        SignRuleEngine('mobile')
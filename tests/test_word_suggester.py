@@ -0,0 +1,70 @@
+import threading
+import time
+
+from word_suggester import WordSuggester
+
+
+def wait_for(suggester, word, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        suggestions = suggester.get(word)
+        if suggestions is not None:
+            return suggestions
+        time.sleep(0.005)
+    raise AssertionError(f'no suggestions for {word!r}')
+
+
+def test_suggestions_are_computed_once():
+    calls = []
+
+    def suggest(word):
+        calls.append(word)
+        return [word.upper()]
+
+    suggester = WordSuggester(suggest)
+    assert suggester.get('helo') is None
+    suggester.request('helo')
+    assert wait_for(suggester, 'helo') == ['HELO']
+    suggester.request('helo')
+    assert suggester.get('helo') == ['HELO']
+    assert calls == ['helo']
+
+
+def test_only_the_latest_word_is_computed():
+    release = threading.Event()
+    calls = []
+
+    def suggest(word):
+        calls.append(word)
+        release.wait(2)
+        return [word]
+
+    suggester = WordSuggester(suggest)
+    suggester.request('h')
+    while not calls:
+        time.sleep(0.005)
+    # 'he' is replaced by 'hel' before the worker is free again
+    suggester.request('he')
+    suggester.request('hel')
+    release.set()
+    assert wait_for(suggester, 'hel') == ['hel']
+    assert calls == ['h', 'hel']
+
+
+def test_errors_give_no_suggestions_and_old_words_are_forgotten():
+    def suggest(word):
+        if word == 'bad':
+            raise RuntimeError('dictionary gone')
+        return [word]
+
+    suggester = WordSuggester(suggest, max_entries=2)
+    assert wait_for_requested(suggester, 'bad') == []
+    for word in ('a', 'b'):
+        wait_for_requested(suggester, word)
+    assert suggester.get('bad') is None
+    assert suggester.stats()['entries'] == 2
+
+
+def wait_for_requested(suggester, word):
+    suggester.request(word)
+    return wait_for(suggester, word)
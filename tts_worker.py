@@ -0,0 +1,200 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class SpeechQueueFull(RuntimeError):
+    """Raised when max_queue utterances are already waiting"""
+
+
+# Engine properties a job may set; anything not given uses the engine's defaults
+VOICE_SETTINGS = ('rate', 'volume', 'voice')
+
+
+class SpeechJob:
+    """Text to speak aloud, or to write to output as an audio file when output is set"""
+
+    def __init__(self, job_id, text, output=None, settings=None):
+        self.id = job_id
+        self.text = text
+        self.output = output
+        self.settings = dict(settings or {})
+        self.state = 'queued'  # queued -> speaking -> done | failed, or queued -> cancelled
+        self.error = None
+        self.queued_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+        self.finished = threading.Event()
+
+    def same_as(self, text, output, settings):
+        return self.text == text and self.output == output and self.settings == dict(settings or {})
+
+    def wait(self, timeout=None):
+        """Block until the job is done, failed or cancelled; False on timeout"""
+        return self.finished.wait(timeout)
+
+    def to_dict(self):
+        return {'job_id': self.id, 'state': self.state, 'text': self.text, 'error': self.error}
+
+
+class SpeechWorker:
+    """
+    Speaks queued texts one at a time on its own thread.
+
+    A pyttsx3 engine must stay on one thread and runAndWait() blocks for the
+    whole utterance, so the engine is created and used only by the worker
+    thread and requests just queue text and get a job id back. The same
+    thread renders audio files (output=path) for clients that play speech
+    themselves. Submitting a job identical to one still waiting returns the
+    waiting job instead of a second one; replace=True cancels every spoken
+    job still waiting first (file renders are left alone). Finished
+    jobs are kept for status lookups, up to `history` of them, and passed to
+    on_finish(job) once they are done, failed or cancelled.
+    """
+
+    def __init__(self, engine_factory, max_queue=8, history=256, on_finish=None):
+        self.engine_factory = engine_factory
+        self.max_queue = max_queue
+        self.history = history
+        self.on_finish = on_finish
+
+        self._pending = deque()
+        self._jobs = OrderedDict()
+        self._current = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._thread = None
+
+        self._spoken = 0
+        self._failed = 0
+        self._cancelled = 0
+        self._coalesced = 0
+        self._rejected = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='speech-worker', daemon=True)
+                self._thread.start()
+
+    def submit(self, text, replace=False, output=None, settings=None):
+        """
+        Queue text without waiting for it to be spoken (or written to output)
+        Returns: (SpeechJob, queued) - queued is False when an identical waiting job was returned
+        """
+        self.start()
+        cancelled = []
+        try:
+            with self._lock:
+                if replace:
+                    for job in [job for job in self._pending if job.output is None]:
+                        self._pending.remove(job)
+                        cancelled.append(self._cancel(job))
+                for job in self._pending:
+                    if job.same_as(text, output, settings):
+                        self._coalesced += 1
+                        return job, False
+                if len(self._pending) >= self.max_queue:
+                    self._rejected += 1
+                    raise SpeechQueueFull(f"Speech queue is full ({self.max_queue} waiting)")
+                job = SpeechJob(str(next(self._ids)), text, output, settings)
+                self._pending.append(job)
+                self._jobs[job.id] = job
+                self._trim()
+                self._ready.notify()
+                return job, True
+        finally:
+            self._finished(cancelled)
+
+    def cancel(self, job_id):
+        """
+        Cancel a job that has not started
+        Returns: the job (check its state), or None for an unknown id
+        """
+        cancelled = []
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.state == 'queued':
+                self._pending.remove(job)
+                cancelled.append(self._cancel(job))
+        self._finished(cancelled)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_queue': self.max_queue,
+                'queue_depth': len(self._pending),
+                'speaking': self._current is not None,
+                'spoken': self._spoken,
+                'failed': self._failed,
+                'cancelled': self._cancelled,
+                'coalesced': self._coalesced,
+                'rejected': self._rejected,
+            }
+
+    def _cancel(self, job):
+        job.state = 'cancelled'
+        job.finished_at = time.monotonic()
+        self._cancelled += 1
+        job.finished.set()
+        return job
+
+    def _finished(self, jobs):
+        # Outside the lock, on_finish may take its time
+        if self.on_finish is not None:
+            for job in jobs:
+                self.on_finish(job)
+
+    def _trim(self):
+        # Forget the oldest finished jobs; waiting and running ones always stay
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.history:
+                break
+            if self._jobs[job_id].state not in ('queued', 'speaking'):
+                del self._jobs[job_id]
+
+    def _run(self):
+        engine = defaults = None
+        while True:
+            with self._lock:
+                while not self._pending:
+                    self._ready.wait()
+                job = self._current = self._pending.popleft()
+                job.state = 'speaking'
+                job.started_at = time.monotonic()
+
+            try:
+                if engine is None:
+                    engine = self.engine_factory()
+                    defaults = {name: engine.getProperty(name) for name in VOICE_SETTINGS}
+                for name, value in dict(defaults, **job.settings).items():
+                    engine.setProperty(name, value)
+                if job.output is None:
+                    engine.say(job.text)
+                else:
+                    engine.save_to_file(job.text, job.output)
+                engine.runAndWait()
+            except Exception as e:
+                print(f"Speech error: {e}")
+                # Start from a fresh engine next time, this one may be broken
+                engine = None
+                with self._lock:
+                    job.state, job.error = 'failed', str(e)
+                    self._failed += 1
+            else:
+                with self._lock:
+                    job.state = 'done'
+                    self._spoken += 1
+
+            with self._lock:
+                job.finished_at = time.monotonic()
+                self._current = None
+            job.finished.set()
+            self._finished([job])
@@ -0,0 +1,85 @@
+import threading
+from collections import OrderedDict
+
+
+class WordSuggester:
+    """
+    Spelling suggestions computed on a background thread and memoized by word.
+
+    suggest_fn (enchant's Dict.suggest) takes milliseconds per call, too long
+    for the Tk thread that also runs the video loop. request(word) only records
+    the word the user is spelling now; the worker computes the latest one and
+    skips words that were replaced before it got to them. get(word) returns
+    the suggestions once they are ready, None until then. The last
+    max_entries words are remembered, so going back to a word costs nothing.
+    """
+
+    def __init__(self, suggest_fn, max_entries=256):
+        self.suggest_fn = suggest_fn
+        self.max_entries = max_entries
+
+        self._cache = OrderedDict()  # word -> suggestions, least recently used first
+        self._wanted = None
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._thread = None
+
+        self._hits = 0
+        self._computed = 0
+        self._skipped = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='word-suggester', daemon=True)
+                self._thread.start()
+
+    def request(self, word):
+        """Ask for the suggestions of word without waiting for them"""
+        self.start()
+        with self._lock:
+            if word in self._cache or word == self._wanted:
+                return
+            if self._wanted is not None:
+                self._skipped += 1
+            self._wanted = word
+            self._ready.notify()
+
+    def get(self, word):
+        """Suggestions for word if they have been computed, else None"""
+        with self._lock:
+            suggestions = self._cache.get(word)
+            if suggestions is not None:
+                self._cache.move_to_end(word)
+                self._hits += 1
+            return suggestions
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._cache),
+                'hits': self._hits,
+                'computed': self._computed,
+                'skipped': self._skipped,
+            }
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while self._wanted is None:
+                    self._ready.wait()
+                word = self._wanted
+
+            try:
+                suggestions = list(self.suggest_fn(word))
+            except Exception as e:
+                print(f"Suggestion error for {word!r}: {e}")
+                suggestions = []
+
+            with self._lock:
+                self._cache[word] = suggestions
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+                self._computed += 1
+                if self._wanted == word:
+                    self._wanted = None